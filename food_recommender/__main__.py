@@ -0,0 +1,39 @@
+"""Command line entry point: python -m food_recommender [gui|serve|batch] [options]
+
+gui --perf shows the performance panel (as does FOOD_PERF=1).
+gui --profile-startup prints the startup phase timings once the catalog has loaded.
+gui --no-history keeps the recently shown foods for this session only.
+"""
+import os
+import sys
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# The modules import each other as top-level scripts
+sys.path.insert(0, PACKAGE_DIR)
+
+COMMANDS = ('gui', 'serve', 'batch')
+
+
+def run(argv):
+    command = argv[0] if argv and argv[0] in COMMANDS else 'gui'
+    args = argv[1:] if argv and argv[0] in COMMANDS else argv
+
+    if command == 'serve':
+        import server
+        server.main(args)
+    elif command == 'batch':
+        import batch
+        batch.main(args)
+    else:
+        if '--perf' in args:
+            import perf
+            perf.enable()
+        # The GUI resolves food_data.json and images/ relative to its folder
+        os.chdir(PACKAGE_DIR)
+        import main
+        main.main(profile_startup='--profile-startup' in args, keep_history='--no-history' not in args)
+
+
+if __name__ == "__main__":
+    run(sys.argv[1:])
@@ -0,0 +1,320 @@
+"""Deduplicate catalog images and pack their thumbnails into atlas files
+
+A build step, run after adding or downloading images:
+
+1. Every image the catalog references is hashed with SHA-1, so exact
+   copies share one tile. With --near, re-encodes and resizes count as
+   copies too: their thumbnails must be within --threshold bits of each
+   other's 64-bit difference hash, and every region of an 8x6 grid must
+   match to within MAX_REGION_DIFF on average. Placeholders of different
+   foods can share a colour and a hash and differ only in their text, so
+   the hash alone is never enough.
+2. Each group of duplicates keeps the file referenced first. The index
+   maps the others to its tile. With --rewrite the catalog entries
+   pointing at them are rewritten too, so the GUI decodes and holds one
+   PhotoImage per distinct picture.
+3. The remaining thumbnails are packed into grid atlases saved as JPEG,
+   next to an index that maps every image to its atlas and tile and
+   records the source file's mtime and size.
+
+At runtime ImageAtlas decodes an atlas once, on the first request for any
+of its tiles, and crops the tiles out of it. Images changed since the
+build are not served from the atlas, so the loader decodes them itself.
+
+Usage: python asset_atlas.py [food_data.json] [--near] [--threshold BITS] [--rewrite]
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from catalog_loader import iter_catalog
+from image_loader import THUMBNAIL_SIZE, decode_thumbnail, file_signature
+
+ATLAS_DIR = os.path.join('images', 'atlas')
+INDEX_NAME = 'index.json'
+INDEX_VERSION = 1
+DEFAULT_IMAGE = 'default_food.jpg'
+
+# Tiles per atlas row and per atlas
+ATLAS_COLUMNS = 16
+ATLAS_TILES = 256
+JPEG_QUALITY = 92
+
+# Near-duplicate matching (opt-in): differing dHash bits, and the mean
+# absolute difference (0-255) allowed in any region of the thumbnails
+DHASH_THRESHOLD = 2
+REGION_GRID = (8, 6)
+MAX_REGION_DIFF = 10
+
+# Decoded atlases kept in memory
+MAX_SHEETS = 4
+
+_IMAGE_FIELD = re.compile(r'("image"\s*:\s*)("(?:[^"\\]|\\.)*")')
+
+
+def cell_size(size=THUMBNAIL_SIZE):
+    """Tile size rounded up to whole 8x8 JPEG blocks, so tiles never share a block"""
+    return tuple(-(-side // 8) * 8 for side in size)
+
+
+def content_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def dhash(image):
+    """64-bit difference hash: whether each pixel of a 9x8 grayscale copy is brighter than its right neighbour"""
+    from PIL import Image
+
+    pixels = image.convert('L').resize((9, 8), Image.Resampling.LANCZOS).tobytes()
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            bits = bits << 1 | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return bits
+
+
+def region_difference(a, b):
+    """Largest mean absolute difference of any channel over a grid of regions
+
+    Local changes such as a different label stand out here, where a mean
+    over the whole thumbnail would dilute them.
+    """
+    from PIL import Image, ImageChops
+
+    difference = ImageChops.difference(a, b).resize(REGION_GRID, Image.Resampling.BOX)
+    return max(difference.tobytes())
+
+
+def _thumbnail(path):
+    try:
+        return decode_thumbnail(path)
+    except OSError as e:
+        print(f"Error loading image {path}: {e}")
+        return None
+
+
+def referenced_images(catalog_path):
+    """Distinct image paths in catalog order, the default image first"""
+    images = [DEFAULT_IMAGE]
+    for mood, food, offset, length in iter_catalog(catalog_path):
+        if isinstance(food, dict) and isinstance(food.get('image'), str):
+            images.append(food['image'])
+    return list(dict.fromkeys(images))
+
+
+def find_duplicates(images, thumbnails, hashes, near=False, threshold=DHASH_THRESHOLD):
+    """Map every duplicate image to the earliest image it matches
+
+    Only byte-identical files match unless near is set.
+    """
+    canonical = {}
+    by_content = {}
+    kept = []
+    for image in images:
+        original = by_content.setdefault(hashes[image], image)
+        if original != image:
+            canonical[image] = original
+            continue
+        if not near:
+            continue
+        thumbnail = thumbnails[image]
+        signature = dhash(thumbnail)
+        for other, other_signature in kept:
+            if (bin(signature ^ other_signature).count('1') <= threshold
+                    and region_difference(thumbnail, thumbnails[other]) <= MAX_REGION_DIFF):
+                canonical[image] = other
+                break
+        else:
+            kept.append((image, signature))
+    return canonical
+
+
+def rewrite_catalog(catalog_path, aliases):
+    """Point image fields at their canonical file, leaving the rest of the text untouched
+
+    Returns the number of entries changed.
+    """
+    changed = 0
+
+    def replace(match):
+        nonlocal changed
+        target = aliases.get(json.loads(match.group(2)))
+        if target is None:
+            return match.group(0)
+        changed += 1
+        return match.group(1) + json.dumps(target, ensure_ascii=False)
+
+    with open(catalog_path, encoding='utf-8', newline='') as f:
+        text = _IMAGE_FIELD.sub(replace, f.read())
+    if changed:
+        tmp_path = f'{catalog_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+            f.write(text)
+        os.replace(tmp_path, catalog_path)
+    return changed
+
+
+def pack(images, thumbnails, atlas_dir, size=THUMBNAIL_SIZE):
+    """Paste thumbnails into grid atlases; returns (atlas file names, {image: (atlas, x, y)})"""
+    from PIL import Image
+
+    cell_w, cell_h = cell_size(size)
+    os.makedirs(atlas_dir, exist_ok=True)
+    names = []
+    tiles = {}
+    for start in range(0, len(images), ATLAS_TILES):
+        batch = images[start:start + ATLAS_TILES]
+        columns = min(len(batch), ATLAS_COLUMNS)
+        rows = -(-len(batch) // columns)
+        sheet = Image.new('RGB', (columns * cell_w, rows * cell_h))
+        for i, image in enumerate(batch):
+            x, y = (i % columns) * cell_w, (i // columns) * cell_h
+            sheet.paste(thumbnails[image], (x, y))
+            tiles[image] = (len(names), x, y)
+        name = f'atlas_{len(names)}.jpg'
+        tmp_path = os.path.join(atlas_dir, f'{name}.{os.getpid()}.tmp')
+        # No chroma subsampling, so colours stay inside their own tile
+        sheet.save(tmp_path, 'JPEG', quality=JPEG_QUALITY, subsampling=0)
+        os.replace(tmp_path, os.path.join(atlas_dir, name))
+        names.append(name)
+    return names, tiles
+
+
+def build_atlas(catalog_path='food_data.json', near=False, threshold=DHASH_THRESHOLD, rewrite=False,
+                workers=4):
+    """Deduplicate the catalog's images and pack their thumbnails"""
+    base_dir = os.path.dirname(catalog_path) or '.'
+    images = referenced_images(catalog_path)
+
+    # Pillow releases the GIL while decoding, so threads are enough here
+    with ThreadPoolExecutor(workers) as pool:
+        thumbnails = dict(zip(images, pool.map(
+            lambda image: _thumbnail(os.path.join(base_dir, image)), images)))
+    missing = [image for image, thumbnail in thumbnails.items() if thumbnail is None]
+    images = [image for image in images if thumbnails[image] is not None]
+    hashes = {image: content_hash(os.path.join(base_dir, image)) for image in images}
+    aliases = find_duplicates(images, thumbnails, hashes, near, threshold)
+    unique = [image for image in images if image not in aliases]
+
+    atlas_dir = os.path.join(base_dir, ATLAS_DIR)
+    names, tiles = pack(unique, thumbnails, atlas_dir)
+    entries = {}
+    for image in images:
+        atlas, x, y = tiles[aliases.get(image, image)]
+        mtime_ns, nbytes = file_signature(os.path.join(base_dir, image))
+        entries[image] = [atlas, x, y, mtime_ns, nbytes]
+    index = {
+        'version': INDEX_VERSION,
+        'tile': list(THUMBNAIL_SIZE),
+        'atlases': names,
+        'images': entries,
+    }
+    index_path = os.path.join(atlas_dir, INDEX_NAME)
+    tmp_path = f'{index_path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2)
+    os.replace(tmp_path, index_path)
+
+    # Rewrite last, so a watcher reloading the catalog finds the new atlas
+    rewritten = rewrite_catalog(catalog_path, aliases) if rewrite and aliases else 0
+    return {
+        'images': len(images),
+        'unique': len(unique),
+        'duplicates': aliases,
+        'missing': missing,
+        'atlases': len(names),
+        'rewritten': rewritten,
+    }
+
+
+class ImageAtlas:
+    """Serves thumbnails cropped from the packed atlases"""
+
+    def __init__(self, index, base_dir):
+        self.base_dir = base_dir
+        self.size = tuple(index['tile'])
+        atlas_dir = os.path.join(base_dir, ATLAS_DIR)
+        self.paths = [os.path.join(atlas_dir, name) for name in index['atlases']]
+        self.entries = {
+            os.path.normpath(os.path.join(base_dir, image)): (atlas, x, y, (mtime_ns, nbytes))
+            for image, (atlas, x, y, mtime_ns, nbytes) in index['images'].items()
+        }
+        self._sheets = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, base_dir='.'):
+        """The atlas built for a catalog directory, or None if there is none"""
+        try:
+            with open(os.path.join(base_dir, ATLAS_DIR, INDEX_NAME), encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if index.get('version') != INDEX_VERSION:
+            return None
+        return cls(index, base_dir)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _sheet(self, atlas):
+        """Decode an atlas on first use (safe to call from several threads)"""
+        from PIL import Image
+
+        with self._lock:
+            sheet = self._sheets.get(atlas)
+            if sheet is None:
+                with Image.open(self.paths[atlas]) as image:
+                    sheet = self._sheets[atlas] = image.convert('RGB')
+                while len(self._sheets) > MAX_SHEETS:
+                    self._sheets.popitem(last=False)
+            self._sheets.move_to_end(atlas)
+            return sheet
+
+    def tile(self, path, size=THUMBNAIL_SIZE):
+        """The thumbnail for an image path, or None when it is not packed or changed since the build"""
+        entry = self.entries.get(os.path.normpath(path))
+        if entry is None or tuple(size) != self.size:
+            return None
+        atlas, x, y, signature = entry
+        if file_signature(path) != signature:
+            return None
+        try:
+            sheet = self._sheet(atlas)
+        except OSError:
+            return None
+        return sheet.crop((x, y, x + size[0], y + size[1]))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Deduplicate catalog images and pack thumbnail atlases")
+    parser.add_argument('catalog', nargs='?', default='food_data.json')
+    parser.add_argument('--near', action='store_true',
+                        help="also merge re-encoded or resized copies, not only identical files")
+    parser.add_argument('--threshold', type=int, default=DHASH_THRESHOLD,
+                        help="differing hash bits (of 64) still counted as the same picture with --near")
+    parser.add_argument('--rewrite', action='store_true',
+                        help="point catalog entries at the kept copy of each duplicate")
+    args = parser.parse_args(argv)
+
+    summary = build_atlas(args.catalog, args.near, args.threshold, args.rewrite)
+    for duplicate, original in summary['duplicates'].items():
+        print(f"Duplicate: {duplicate} -> {original}")
+    for image in summary['missing']:
+        print(f"Missing: {image}")
+    print(f"\n✅ {summary['unique']} distinct images of {summary['images']} packed into "
+          f"{summary['atlases']} atlas file(s) under {ATLAS_DIR}/")
+    if summary['rewritten']:
+        print(f"✏️ {summary['rewritten']} catalog entries now point at the kept copy")
+    elif summary['duplicates'] and not args.rewrite:
+        print("Catalog left unchanged; run with --rewrite to point entries at the kept copies")
+
+
+if __name__ == "__main__":
+    main()
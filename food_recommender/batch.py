@@ -0,0 +1,244 @@
+"""Offline recommendations for bulk user preference files
+
+Reads a JSONL or CSV file of requests, one per user:
+
+    {"user": "u1", "mood": "happy", "veg": true, "quick": 1}
+    user,mood,veg,healthy,quick,low_cal,exclude,require
+
+and writes one JSON line per input row with the same filter semantics as
+the GUI's apply_filters (exclude/require are optional, comma-separated
+ingredient lists). Input is streamed in chunks to a process pool whose
+workers share the memory-mapped compiled catalog. Identical requests are
+grouped: each worker renders a unique (mood, filters, ingredients)
+combination once and reuses the rendered JSON for every later row.
+Output keeps the input order; throughput is reported on stderr. A row
+that cannot be read (bad JSON, not an object, wrong field types) does not
+stop the run: its output line is {"user": ..., "line": N, "error": ...},
+with N the row's line number in the input.
+
+Usage: python -m food_recommender batch INPUT [-o OUTPUT] [--workers N]
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from catalog_compiler import load_engine
+from ingredient_index import parse_terms
+from recommender_engine import DEFAULT_CATALOG, FILTER_NAMES, TRUE_VALUES, iter_bits
+
+CHUNK_ROWS = 10000
+
+# Set in each worker process by _init_worker
+_engine = None
+_details = False
+_rendered = {}
+
+
+def parse_flag(value):
+    if isinstance(value, bool):
+        return value
+    return str(value or '').strip().lower() in TRUE_VALUES
+
+
+def _numbered_records(reader):
+    """(line number, fields) for each CSV record, numbered by the line it starts on"""
+    line = reader.line_num
+    for row in reader:
+        yield line + 1, row
+        line = reader.line_num
+
+
+def iter_chunks(path, fmt=None, size=CHUNK_ROWS):
+    """Stream the input as (header, rows) chunks ('-' reads stdin)
+
+    Rows are (line number, row) pairs. JSONL rows are raw lines, so JSON
+    parsing happens in the workers; CSV rows are field lists plus the
+    header they belong to.
+    """
+    fmt = fmt or ('csv' if path.lower().endswith('.csv') else 'jsonl')
+    f = sys.stdin if path == '-' else open(path, encoding='utf-8', newline='')
+    try:
+        header = None
+        if fmt == 'csv':
+            reader = csv.reader(f)
+            header = next(reader, None)
+            rows = _numbered_records(reader)
+        else:
+            rows = enumerate(f, 1)
+        chunk = []
+        for line, row in rows:
+            chunk.append((line, row))
+            if len(chunk) >= size:
+                yield header, chunk
+                chunk = []
+        if chunk:
+            yield header, chunk
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def request_key(row):
+    """The part of a row that determines its recommendations"""
+    mood = str(row.get('mood') or '').strip().lower()
+    mask = 0
+    for i, name in enumerate(FILTER_NAMES):
+        if parse_flag(row.get(name)):
+            mask |= 1 << i
+    return mood, mask, _terms(row, 'exclude'), _terms(row, 'require')
+
+
+def _terms(row, field):
+    value = row.get(field) or ''
+    if not isinstance(value, str):
+        raise ValueError(f"{field}: expected comma-separated text, got {type(value).__name__}")
+    return parse_terms(value)
+
+
+def _init_worker(catalog, details):
+    global _engine, _details
+    _engine = load_engine(catalog)
+    _details = details
+    _rendered.clear()
+
+
+def render_key(key):
+    """Render the JSON fields shared by every row with this request key"""
+    mood, mask, exclude, require = key
+    if mood not in _engine.mood_bits:
+        return json.dumps({'mood': mood, 'error': f'unknown mood {mood!r}'}, ensure_ascii=False)[1:-1]
+    food_ids = list(iter_bits(_engine.query_bits(mood, mask, exclude, require)))
+    if _details:
+        foods = [_engine.details(food_id) for food_id in food_ids]
+    else:
+        foods = [_engine.record(food_id).name for food_id in food_ids]
+    payload = {
+        'mood': mood,
+        'filters': {name: bool(mask & (1 << i)) for i, name in enumerate(FILTER_NAMES)},
+        'exclude': exclude,
+        'require': require,
+        'count': len(foods),
+        'foods': foods,
+    }
+    # Without the braces, so each output row only has to prepend its user
+    return json.dumps(payload, ensure_ascii=False)[1:-1]
+
+
+def error_line(user, line, error):
+    """Output line for an input row that could not be processed"""
+    return json.dumps({'user': user, 'line': line, 'error': error}, ensure_ascii=False) + '\n'
+
+
+def render_chunk(header, rows):
+    """Turn a chunk of (line number, row) pairs into output lines
+
+    Returns (text, row count, request keys seen, rows in error). Each unique
+    key is rendered once per process and reused for every later row asking
+    for it. A row that cannot be read gets an error line instead.
+    """
+    lines = []
+    keys = set()
+    count = errors = 0
+    for line, row in rows:
+        if header is None and not row.strip():
+            continue
+        count += 1
+        user = None
+        try:
+            row = dict(zip(header, row)) if header is not None else json.loads(row)
+            if not isinstance(row, dict):
+                raise ValueError(f"expected a JSON object, got {type(row).__name__}")
+            user = row.get('user')
+            key = request_key(row)
+        except ValueError as e:
+            errors += 1
+            lines.append(error_line(user, line, str(e)))
+            continue
+        keys.add(key)
+        fragment = _rendered.get(key)
+        if fragment is None:
+            fragment = _rendered[key] = render_key(key)
+        lines.append('{"user": ' + json.dumps(user, ensure_ascii=False) + ', ' + fragment + '}\n')
+    return ''.join(lines), count, keys, errors
+
+
+def run_batch(input_path, out, catalog=DEFAULT_CATALOG, workers=None, details=False,
+              fmt=None, chunk_rows=CHUNK_ROWS):
+    """Write one recommendation line per input row and return throughput stats"""
+    # Compile the catalog once up front so the workers only map it
+    load_engine(catalog)
+    workers = os.cpu_count() if workers is None else workers
+    unique = set()
+    rows = errors = 0
+    start = time.perf_counter()
+
+    def write(result):
+        nonlocal rows, errors
+        text, count, keys, failed = result
+        out.write(text)
+        rows += count
+        errors += failed
+        unique.update(keys)
+
+    chunks = iter_chunks(input_path, fmt, chunk_rows)
+    if workers <= 0:
+        _init_worker(catalog, details)
+        for header, chunk in chunks:
+            write(render_chunk(header, chunk))
+    else:
+        # A bounded window of chunks in flight keeps memory flat and output in order
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(catalog, details)) as pool:
+            pending = deque()
+            for header, chunk in chunks:
+                pending.append(pool.submit(render_chunk, header, chunk))
+                if len(pending) >= workers * 2:
+                    write(pending.popleft().result())
+            while pending:
+                write(pending.popleft().result())
+
+    elapsed = time.perf_counter() - start
+    return {
+        'rows': rows,
+        'unique_requests': len(unique),
+        'errors': errors,
+        'seconds': elapsed,
+        'rows_per_second': rows / elapsed if elapsed else 0.0,
+    }
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Precompute recommendations for a file of user requests")
+    parser.add_argument('input', help="JSONL or CSV file of requests, '-' for stdin")
+    parser.add_argument('-o', '--output', default='-', help="JSONL output file (default: stdout)")
+    parser.add_argument('--catalog', default=DEFAULT_CATALOG)
+    parser.add_argument('--format', choices=('jsonl', 'csv'), help="input format (default: by extension)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="worker processes, 0 to render inline (default: CPU count)")
+    parser.add_argument('--details', action='store_true', help="write full food entries instead of names")
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    out = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    try:
+        stats = run_batch(args.input, out, args.catalog, args.workers, args.details,
+                          args.format, args.chunk_rows)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"{stats['rows']} rows, {stats['unique_requests']} unique requests in "
+          f"{stats['seconds']:.2f} s ({stats['rows_per_second']:,.0f} rows/s)", file=sys.stderr)
+    if stats['errors']:
+        print(f"{stats['errors']} rows could not be read; see the \"error\" lines in the output",
+              file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
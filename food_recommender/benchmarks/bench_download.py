@@ -0,0 +1,137 @@
+"""Compare the serial image download loop with the concurrent downloader
+
+A local stand-in server serves generated JPEGs with a fixed per-request
+latency, honours If-None-Match with 304 and can fail the first request
+for a path to exercise retries. Usage:
+
+    python benchmarks/bench_download.py [image count] [latency ms]
+"""
+import hashlib
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import requests
+from PIL import Image
+
+from download_images import download_default_images, image_destination
+
+
+def make_jpeg(seed, size=(800, 600)):
+    image = Image.new('RGB', size, ((seed * 37) % 256, (seed * 91) % 256, (seed * 53) % 256))
+    buf = io.BytesIO()
+    image.save(buf, 'JPEG', quality=90)
+    return buf.getvalue()
+
+
+class StandInServer:
+    """Threaded HTTP server serving /<name>.jpg from memory"""
+
+    def __init__(self, images, latency=0.05, fail_first=False):
+        self.images = images
+        self.latency = latency
+        self.fail_first = fail_first
+        self.requests = 0
+        self.not_modified = 0
+        self._failed = set()
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                time.sleep(server.latency)
+                name = self.path.lstrip('/')
+                with server._lock:
+                    server.requests += 1
+                    first = server.fail_first and name not in server._failed
+                    server._failed.add(name)
+                if first:
+                    self.send_error(503)
+                    return
+                body = server.images.get(name)
+                if body is None:
+                    self.send_error(404)
+                    return
+                etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+                if self.headers.get('If-None-Match') == etag:
+                    with server._lock:
+                        server.not_modified += 1
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'image/jpeg')
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('ETag', etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.httpd.server_port}'
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def urls(self):
+        return {name: f'{self.url}/{name}' for name in self.images}
+
+    def close(self):
+        self.httpd.shutdown()
+
+
+def download_serial(urls, dest):
+    """The original loop: one bare requests.get, resize and save at a time"""
+    os.makedirs(os.path.join(dest, 'images'), exist_ok=True)
+    for filename, url in urls.items():
+        response = requests.get(url)
+        if response.status_code == 200:
+            image = Image.open(io.BytesIO(response.content))
+            image = image.resize((400, 300), Image.Resampling.LANCZOS)
+            image.save(image_destination(filename, dest))
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def main(count=32, latency_ms=50):
+    images = {f'food_{i}.jpg': make_jpeg(i) for i in range(count)}
+    server = StandInServer(images, latency=latency_ms / 1000)
+    try:
+        with tempfile.TemporaryDirectory() as serial_dir, tempfile.TemporaryDirectory() as dest:
+            serial, _ = timed(download_serial, server.urls(), serial_dir)
+            cold, counts = timed(download_default_images, server.urls(), dest)
+            warm, warm_counts = timed(download_default_images, server.urls(), dest)
+            offline, _ = timed(download_default_images, server.urls(), dest, revalidate=False)
+    finally:
+        server.close()
+
+    print(f"\n{count} images, {latency_ms} ms latency per request")
+    print(f"  serial requests.get loop   {serial:7.3f} s")
+    print(f"  concurrent, cold           {cold:7.3f} s  {counts}")
+    print(f"  concurrent, revalidated    {warm:7.3f} s  {warm_counts}")
+    print(f"  concurrent, manifest only  {offline:7.3f} s")
+
+    # Every first request for a path fails with 503 and must be retried
+    flaky = StandInServer(images, latency=0, fail_first=True)
+    try:
+        with tempfile.TemporaryDirectory() as dest:
+            counts = download_default_images(flaky.urls(), dest)
+    finally:
+        flaky.close()
+    print(f"  retry after 503            {counts} in {flaky.requests} requests")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:3]])
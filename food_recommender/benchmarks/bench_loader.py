@@ -0,0 +1,59 @@
+"""Compare load time and peak RSS of the catalog loaders
+
+Each loader runs in a fresh subprocess so its peak RSS is measured in
+isolation. Usage: python benchmarks/bench_loader.py [item counts...]
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from synthetic_catalog import write_catalog
+
+LOADERS = {
+    'json.load (current)': ('food_data.json', "json.load(open(path, encoding='utf-8'))"),
+    'engine eager': ('food_data.json', "RecommenderEngine(json.load(open(path, encoding='utf-8')))"),
+    'engine streaming': ('food_data.json', "RecommenderEngine.from_file(path)"),
+    'engine ndjson': ('food_data.jsonl', "RecommenderEngine.from_file(path)"),
+}
+
+CHILD_SCRIPT = """
+import json, resource, sys, time
+sys.path.insert(0, {root!r})
+from recommender_engine import RecommenderEngine
+path = {path!r}
+start = time.perf_counter()
+data = {expr}
+elapsed = time.perf_counter() - start
+peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{'seconds': elapsed, 'peak_rss_mb': peak_kb / 1024}}))
+"""
+
+
+def run_loader(path, expr):
+    """Time one loader in a clean interpreter"""
+    script = CHILD_SCRIPT.format(root=os.path.dirname(BENCH_DIR), path=path, expr=expr)
+    output = subprocess.check_output([sys.executable, '-c', script])
+    return json.loads(output)
+
+
+def main(counts):
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in counts:
+            paths = {}
+            for filename in ('food_data.json', 'food_data.jsonl'):
+                paths[filename] = write_catalog(os.path.join(tmp, filename), count)
+            size_mb = os.path.getsize(paths['food_data.json']) / (1024 * 1024)
+            print(f"\n{count} items ({size_mb:.1f} MB JSON)")
+            for name, (filename, expr) in LOADERS.items():
+                result = run_loader(paths[filename], expr)
+                print(f"  {name:<22} {result['seconds']:8.3f} s  {result['peak_rss_mb']:8.1f} MB peak RSS")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1000, 100000])
@@ -0,0 +1,123 @@
+"""Measure server throughput and per-worker memory for 1..N pre-forked workers
+
+Each configuration starts `server.py --workers N` on a synthetic catalog,
+then client processes send keep-alive GET /recommend requests for a fixed
+time. RSS and PSS (which splits shared pages such as the mapped catalog
+between the processes using them) are read from /proc on Linux.
+
+Usage: python benchmarks/bench_server.py [catalog items] [max workers] [seconds]
+"""
+import multiprocessing
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PACKAGE_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from synthetic_catalog import MOODS, write_catalog
+
+PORT = 18080
+
+
+def client(port, seconds, counter):
+    """Send keep-alive requests over one connection until time runs out"""
+    rng = random.Random(os.getpid())
+    sock = socket.create_connection(('127.0.0.1', port))
+    reader = sock.makefile('rb')
+    done = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        flags = '&'.join(f'{name}={rng.randint(0, 1)}' for name in ('veg', 'healthy', 'quick', 'low_cal'))
+        sock.sendall(f'GET /recommend?mood={rng.choice(MOODS)}&{flags} HTTP/1.1\r\n'
+                     f'Host: localhost\r\n\r\n'.encode('ascii'))
+        length = 0
+        while True:
+            line = reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            if line.lower().startswith(b'content-length:'):
+                length = int(line.split(b':')[1])
+        reader.read(length)
+        done += 1
+    sock.close()
+    with counter.get_lock():
+        counter.value += done
+
+
+def memory_kb(pid):
+    """(RSS, PSS) of a process in kB, or (None, None) off Linux"""
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            fields = dict(line.split(':', 1) for line in f if ':' in line)
+    except OSError:
+        return None, None
+    return int(fields['Rss'].split()[0]), int(fields['Pss'].split()[0])
+
+
+def wait_ready(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/health', timeout=1).read()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("server did not start")
+
+
+def child_pids(pid):
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as f:
+            return [int(child) for child in f.read().split()]
+    except OSError:
+        return []
+
+
+def run(catalog, workers, seconds, clients):
+    proc = subprocess.Popen(
+        [sys.executable, 'server.py', '--catalog', catalog, '--port', str(PORT), '--workers', str(workers)],
+        cwd=PACKAGE_DIR, stdout=subprocess.DEVNULL
+    )
+    try:
+        wait_ready(PORT)
+        counter = multiprocessing.Value('l', 0)
+        procs = [multiprocessing.Process(target=client, args=(PORT, seconds, counter)) for _ in range(clients)]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+        pids = child_pids(proc.pid) if workers > 1 else [proc.pid]
+        memory = [memory_kb(pid) for pid in pids]
+        return counter.value / seconds, memory
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main(items=100000, max_workers=None, seconds=5):
+    max_workers = max_workers or os.cpu_count()
+    with tempfile.TemporaryDirectory() as tmp:
+        catalog = write_catalog(os.path.join(tmp, 'food_data.json'), items)
+        print(f"{items} items, {seconds} s per run, {os.cpu_count()} CPUs")
+        baseline = None
+        workers = 1
+        while workers <= max_workers:
+            rate, memory = run(catalog, workers, seconds, clients=max(2, workers * 2))
+            baseline = baseline or rate
+            rss = [kb for kb, _ in memory if kb]
+            pss = [kb for _, kb in memory if kb]
+            mem = (f"RSS {sum(rss) / len(rss) / 1024:6.1f} MB/worker, PSS {sum(pss) / len(pss) / 1024:6.1f} MB/worker"
+                   if rss else "memory n/a")
+            print(f"  {workers:>3} workers  {rate:10,.0f} req/s  {rate / baseline:5.2f}x  {mem}")
+            workers *= 2
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:4]])
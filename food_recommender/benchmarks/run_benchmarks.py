@@ -0,0 +1,278 @@
+"""Benchmark suite for the load, filter, image and display hot paths
+
+For every catalog size a synthetic catalog and its images are generated
+in a temporary folder, then:
+
+    load       load_food_data's path: compiling the catalog (cold),
+               mapping the compiled file (warm) and streaming the JSON
+    filter     apply_filters for all 64 mood/filter combinations, straight
+               from the bitsets and through a cold and a warm ResultCache
+    images     thumbnails for every catalog image: decoded from JPEG,
+               stored into a cold ThumbnailCache and read back warm, and
+               cropped from a freshly loaded atlas (asset_atlas.py)
+    display    display_recommendations for every mood in a withdrawn Tk
+               root (needs a display; run under xvfb-run when headless),
+               plus one scroll pass through the longest list
+
+Results are written as JSON (with the git commit they were measured at)
+so two runs can be compared with --compare.
+
+Usage: python benchmarks/run_benchmarks.py [--sizes 1000 10000] [--output results.json]
+                                          [--compare baseline.json]
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PACKAGE_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, PACKAGE_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from synthetic_catalog import write_catalog, write_images
+
+from catalog_compiler import compiled_path, load_engine
+from recommender_engine import FILTER_NAMES, RecommenderEngine, iter_bits
+from result_cache import ResultCache
+
+DEFAULT_SIZES = [1000, 10000]
+REPEAT = 5
+
+
+def measure(fn, repeat=REPEAT, setup=None):
+    """Run fn repeat times and summarize the wall times in seconds"""
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return {'min': min(times), 'median': statistics.median(times), 'mean': statistics.fmean(times),
+            'repeat': repeat}
+
+
+def bench_load(catalog_path):
+    def remove_compiled():
+        try:
+            os.remove(compiled_path(catalog_path))
+        except FileNotFoundError:
+            pass
+
+    results = {
+        'compile_and_map': measure(lambda: load_engine(catalog_path), setup=remove_compiled),
+        'map_compiled': measure(lambda: load_engine(catalog_path)),
+        'stream_json': measure(lambda: RecommenderEngine.from_file(catalog_path)),
+    }
+    return results
+
+
+def all_queries(engine):
+    masks = range(1 << len(FILTER_NAMES))
+    return [(mood, mask) for mood in engine.moods for mask in masks]
+
+
+def bench_filter(engine):
+    queries = all_queries(engine)
+
+    def uncached():
+        for mood, mask in queries:
+            tuple(iter_bits(engine.query_bits(mood, mask)))
+
+    cache = ResultCache()
+
+    def cached():
+        for mood, mask in queries:
+            cache.food_ids(engine, mood, mask)
+
+    return {
+        'combinations': len(queries),
+        'bitsets': measure(uncached),
+        'cache_cold': measure(cached, setup=cache.invalidate),
+        'cache_warm': measure(cached),
+    }
+
+
+def bench_images(engine, base_dir):
+    from asset_atlas import ImageAtlas, build_atlas
+    from image_loader import decode_thumbnail
+    from thumbnail_cache import ThumbnailCache, image_paths
+
+    paths = image_paths(os.path.join(base_dir, 'food_data.json'))
+    cache_dir = os.path.join(base_dir, '.thumbcache')
+    cache = ThumbnailCache(cache_dir)
+
+    def decode_all():
+        for path in paths:
+            decode_thumbnail(path)
+
+    def load_all():
+        for path in paths:
+            cache.load(path)
+
+    build_atlas(os.path.join(base_dir, 'food_data.json'), rewrite=False)
+
+    def atlas_all():
+        atlas = ImageAtlas.load(base_dir)
+        for path in paths:
+            atlas.tile(path)
+
+    return {
+        'images': len(paths),
+        'decode': measure(decode_all),
+        'cache_cold': measure(load_all, setup=cache.clear),
+        'cache_warm': measure(load_all),
+        'atlas': measure(atlas_all),
+    }
+
+
+def bench_display(base_dir):
+    """Time display_recommendations in a withdrawn root, or explain why it was skipped"""
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception as e:
+        return {'skipped': f"no display available ({e.__class__.__name__}: {e})"}
+
+    cwd = os.getcwd()
+    os.chdir(base_dir)
+    try:
+        root.withdraw()
+        import main
+        app = main.FoodRecommenderApp(root)
+        # The catalog loads in the background after the window is up
+        while not app.catalog_ready:
+            root.update()
+            time.sleep(0.005)
+        app.catalog_watcher.stop()
+        engine = app.engine
+        lists = {mood: engine.recommend(mood) for mood in engine.moods}
+        moods = list(lists)
+
+        def show_all():
+            for mood in moods:
+                app.display_recommendations(lists[mood], mood)
+                root.update_idletasks()
+
+        def clear():
+            app.display_recommendations([], None)
+            root.update_idletasks()
+
+        longest = max(moods, key=lambda mood: len(lists[mood]))
+        steps = 50
+
+        def scroll():
+            for step in range(steps + 1):
+                app.canvas.yview_moveto(step / steps)
+                app.card_list.refresh()
+                root.update_idletasks()
+
+        results = {
+            'cold': measure(show_all, setup=clear),
+            'diff_update': measure(show_all),
+        }
+        app.display_recommendations(lists[longest], longest)
+        results['scroll_pass'] = measure(scroll)
+        results['scroll_steps'] = steps
+        results['cards_created'] = len(app.card_list.active) + len(app.card_list.free)
+        app.image_loader.shutdown()
+        return results
+    finally:
+        os.chdir(cwd)
+        root.destroy()
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=PACKAGE_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(sizes, display=True):
+    report = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'sizes': {},
+    }
+    for size in sizes:
+        base_dir = tempfile.mkdtemp(prefix=f'food-bench-{size}-')
+        try:
+            catalog_path = write_catalog(os.path.join(base_dir, 'food_data.json'), size)
+            write_images(base_dir)
+            results = {'load': bench_load(catalog_path)}
+            engine = load_engine(catalog_path)
+            results['filter'] = bench_filter(engine)
+            results['images'] = bench_images(engine, base_dir)
+            if display:
+                results['display'] = bench_display(base_dir)
+            report['sizes'][str(size)] = results
+        finally:
+            shutil.rmtree(base_dir, ignore_errors=True)
+        print_results(size, report['sizes'][str(size)])
+    return report
+
+
+def flatten(results, prefix=''):
+    """{'load/map_compiled': median seconds, ...} for every timed benchmark"""
+    flat = {}
+    for name, value in results.items():
+        if isinstance(value, dict):
+            if 'median' in value:
+                flat[prefix + name] = value['median']
+            else:
+                flat.update(flatten(value, f'{prefix}{name}/'))
+    return flat
+
+
+def print_results(size, results):
+    print(f"\n{size} items")
+    for name, seconds in flatten(results).items():
+        print(f"  {name:<28} {seconds * 1000:10.3f} ms")
+    skipped = results.get('display', {}).get('skipped')
+    if skipped:
+        print(f"  display skipped: {skipped}")
+
+
+def compare(report, baseline):
+    """Print median-time ratios against an earlier report"""
+    print(f"\nCompared with {baseline.get('commit') or 'baseline'}:")
+    for size, results in report['sizes'].items():
+        old = flatten(baseline.get('sizes', {}).get(size, {}))
+        for name, seconds in flatten(results).items():
+            if old.get(name):
+                ratio = seconds / old[name]
+                flag = '  <-- slower' if ratio > 1.1 else ''
+                print(f"  {size:>8} {name:<28} {ratio:6.2f}x{flag}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the hot-path benchmarks")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help="catalog sizes, e.g. 1000 10000 100000 1000000")
+    parser.add_argument('--output', default='benchmark_results.json', help="JSON report path")
+    parser.add_argument('--compare', help="earlier JSON report to compare against")
+    parser.add_argument('--no-display', dest='display', action='store_false',
+                        help="skip the Tk display benchmark")
+    args = parser.parse_args(argv)
+
+    report = run_suite(args.sizes, args.display)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {args.output}")
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import json
+import os
+import random
+
+MOODS = ['happy', 'sad', 'stressed', 'tired']
+IMAGE_COUNT = 16
+TYPES = ['Dessert', 'Italian', 'Healthy', 'Japanese', 'Comfort Food', 'Soup', 'Beverage', 'Snack', 'Breakfast']
+INGREDIENTS = [
+    'chocolate', 'cream', 'sugar', 'banana', 'mixed berries', 'greek yogurt', 'honey', 'oats',
+    'chicken', 'fish', 'beef', 'rice', 'noodles', 'tomato sauce', 'mozzarella', 'basil',
+    'avocado', 'bread', 'almonds', 'walnuts', 'green tea', 'milk', 'potatoes', 'butter'
+]
+
+
+def synthetic_food(rng, index):
+    """Build one plausible catalog entry"""
+    return {
+        "name": f"Synthetic Food {index}",
+        "type": rng.choice(TYPES),
+        "prep_time": f"{rng.randint(2, 45)} mins",
+        "calories": str(rng.randint(5, 600)),
+        "reason": "Generated entry used for benchmarking the catalog loaders. " * 3,
+        "ingredients": ", ".join(rng.sample(INGREDIENTS, 5)),
+        "tips": "Benchmarks only - this food does not exist.",
+        "image": f"images/synthetic_{index % IMAGE_COUNT}.jpg",
+        "nutrition": {
+            "carbs": f"{rng.randint(0, 60)}g",
+            "protein": f"{rng.randint(0, 30)}g",
+            "fat": f"{rng.randint(0, 25)}g"
+        }
+    }
+
+
+def generate_catalog(count, seed=0):
+    """Return a {mood: [food, ...]} catalog with count entries"""
+    rng = random.Random(seed)
+    catalog = {mood: [] for mood in MOODS}
+    for i in range(count):
+        catalog[MOODS[i % len(MOODS)]].append(synthetic_food(rng, i))
+    return catalog
+
+
+def write_catalog(path, count, seed=0):
+    """Write a synthetic catalog as nested JSON or, for .jsonl paths, JSON lines"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    catalog = generate_catalog(count, seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        if path.endswith(('.jsonl', '.ndjson')):
+            for mood, foods in catalog.items():
+                for food in foods:
+                    f.write(json.dumps(dict(food, mood=mood)) + '\n')
+        else:
+            json.dump(catalog, f, indent=2)
+    return path
+
+
+def write_images(base_dir, count=IMAGE_COUNT, size=(800, 600), seed=0):
+    """Write the JPEGs a synthetic catalog refers to, plus default_food.jpg
+
+    Images are noisy gradients rather than flat colours, so decoding them
+    costs about as much as decoding a photo.
+    """
+    from PIL import Image
+
+    rng = random.Random(seed)
+    os.makedirs(os.path.join(base_dir, 'images'), exist_ok=True)
+    paths = []
+    for i in range(count + 1):
+        base = Image.linear_gradient('L').resize(size).convert('RGB')
+        noise = Image.effect_noise(size, rng.randint(20, 80)).convert('RGB')
+        tint = Image.new('RGB', size, tuple(rng.randint(0, 255) for _ in range(3)))
+        image = Image.blend(Image.blend(base, tint, 0.5), noise, 0.3)
+        path = (os.path.join(base_dir, 'default_food.jpg') if i == count
+                else os.path.join(base_dir, 'images', f'synthetic_{i}.jpg'))
+        image.save(path, 'JPEG', quality=90)
+        paths.append(path)
+    return paths
@@ -0,0 +1,300 @@
+import tkinter as tk
+from collections import OrderedDict
+
+# Every card occupies a fixed-height slot so row positions are pure arithmetic
+ROW_HEIGHT = 280
+CARD_GAP = 16
+CARD_PADX = 5
+OVERSCAN_ROWS = 2
+
+
+class FoodCard:
+    """A food recommendation card whose widgets are reused for different foods"""
+
+    def __init__(self, parent, image_loader, on_more_like_this=None):
+        self.image_loader = image_loader
+        self.image_path = None
+        self.image_request = None
+        self.food_id = None
+
+        self.frame = tk.Frame(parent, relief='raised', bd=1, padx=15, pady=15)
+        self.frame.pack_propagate(False)
+
+        # Main content frame
+        content_frame = tk.Frame(self.frame)
+        content_frame.pack(fill='x')
+
+        # Left side - Image
+        left_frame = tk.Frame(content_frame)
+        left_frame.pack(side='left', padx=(0, 15))
+
+        self.image_label = tk.Label(left_frame, text="🍽️\nLoading...", font=('Arial', 8))
+        self.image_label.image = None
+        self.image_label.pack()
+
+        # Right side - Details
+        right_frame = tk.Frame(content_frame)
+        right_frame.pack(side='left', fill='x', expand=True)
+
+        # Food name and basic info
+        name_frame = tk.Frame(right_frame)
+        name_frame.pack(fill='x', pady=(0, 10))
+
+        self.name_label = tk.Label(name_frame, font=('Arial', 16, 'bold'), fg='#2d3436')
+        self.name_label.pack(side='left')
+
+        # Food type and prep time
+        self.info_label = tk.Label(name_frame, font=('Arial', 10), fg='#636e72')
+        self.info_label.pack(side='left', padx=(15, 0))
+
+        # "More like this" reports the food the card currently shows
+        self.more_button = tk.Button(
+            name_frame, text="🔎 More like this", font=('Arial', 9), cursor='hand2',
+            command=lambda: on_more_like_this(self.food_id)
+        )
+        if on_more_like_this:
+            self.more_button.pack(side='right')
+
+        # Nutrition info
+        self.nutrition_label = tk.Label(right_frame, font=('Arial', 9, 'bold'), fg='#0984e3')
+
+        # Reason
+        self.reason_frame = tk.Frame(right_frame)
+        self.reason_frame.pack(fill='x', pady=5)
+
+        reason_title = tk.Label(
+            self.reason_frame, text="💡 Why it's perfect for you:",
+            font=('Arial', 10, 'bold'), fg='#2d3436'
+        )
+        reason_title.pack(anchor='w')
+
+        self.reason_label = tk.Label(
+            self.reason_frame, font=('Arial', 9), fg='#2d3436', wraplength=600, justify='left'
+        )
+        self.reason_label.pack(anchor='w')
+
+        # Ingredients and tips in two columns
+        details_frame = tk.Frame(right_frame)
+        details_frame.pack(fill='x', pady=5)
+
+        # Ingredients column
+        ingredients_frame = tk.Frame(details_frame)
+        ingredients_frame.pack(side='left', fill='x', expand=True, padx=(0, 10))
+
+        ingredients_title = tk.Label(
+            ingredients_frame, text="📝 Ingredients:", font=('Arial', 10, 'bold'), fg='#2d3436'
+        )
+        ingredients_title.pack(anchor='w')
+
+        self.ingredients_label = tk.Label(
+            ingredients_frame, font=('Arial', 9), fg='#2d3436', wraplength=300, justify='left'
+        )
+        self.ingredients_label.pack(anchor='w')
+
+        # Tips column
+        tips_frame = tk.Frame(details_frame)
+        tips_frame.pack(side='left', fill='x', expand=True, padx=(10, 0))
+
+        tips_title = tk.Label(
+            tips_frame, text="👨‍🍳 Chef's Tip:", font=('Arial', 10, 'bold'), fg='#2d3436'
+        )
+        tips_title.pack(anchor='w')
+
+        self.tips_label = tk.Label(
+            tips_frame, font=('Arial', 9), fg='#2d3436', wraplength=300, justify='left'
+        )
+        self.tips_label.pack(anchor='w')
+
+        # Every widget whose background follows the mood colour
+        self.bg_widgets = [
+            self.frame, content_frame, left_frame, self.image_label, right_frame,
+            name_frame, self.name_label, self.info_label, self.nutrition_label,
+            self.reason_frame, reason_title, self.reason_label, details_frame,
+            ingredients_frame, ingredients_title, self.ingredients_label,
+            tips_frame, tips_title, self.tips_label
+        ]
+        self.bg_color = None
+
+    def show(self, food, index, bg_color, image_path):
+        """Rebind the card to a food, updating text, colours and image in place"""
+        self.set_bg(bg_color)
+        self.set_index(food['name'], index)
+        self.info_label.config(
+            text=f"📋 {food.get('type', '')} | ⏰ {food['prep_time']} | 🔥 {food['calories']} cal"
+        )
+
+        nutrition = food.get('nutrition', {})
+        if nutrition:
+            self.nutrition_label.config(
+                text=f"🍽️ Nutrition: Carbs {nutrition.get('carbs', 'N/A')} | "
+                     f"Protein {nutrition.get('protein', 'N/A')} | Fat {nutrition.get('fat', 'N/A')}"
+            )
+            self.nutrition_label.pack(anchor='w', pady=(0, 5), before=self.reason_frame)
+        else:
+            self.nutrition_label.pack_forget()
+
+        self.reason_label.config(text=food.get('reason', ''))
+        self.ingredients_label.config(text=food.get('ingredients', ''))
+        self.tips_label.config(text=food.get('tips', ''))
+        self.set_image(image_path)
+
+    def set_bg(self, bg_color):
+        if bg_color != self.bg_color:
+            for widget in self.bg_widgets:
+                widget.config(bg=bg_color)
+            self.bg_color = bg_color
+
+    def set_index(self, name, index):
+        self.name_label.config(text=f"{index}. {name}")
+
+    def set_image(self, image_path):
+        """Show the image for path, or a placeholder until the loader delivers it"""
+        # The image this card was waiting for is no longer needed
+        if self.image_request:
+            self.image_loader.cancel(*self.image_request)
+            self.image_request = None
+        self.image_path = image_path
+        photo = self.image_loader.get(image_path)
+        if photo:
+            self.show_photo(image_path, photo)
+            return
+        self.image_label.config(image='', text="🍽️\nLoading...")
+        self.image_label.image = None
+        callback = lambda photo, path=image_path: self.show_photo(path, photo)
+        self.image_request = (image_path, callback)
+        self.image_loader.request(image_path, image_path, callback=callback)
+
+    def show_photo(self, image_path, photo):
+        """Display a decoded image unless the card was rebound in the meantime"""
+        if image_path != self.image_path or not self.image_label.winfo_exists():
+            return
+        self.image_request = None
+        if photo:
+            self.image_label.config(image=photo, text='')
+        else:
+            self.image_label.config(image='', text="🍽️\nNo Image")
+        # Keep a reference so LRU eviction cannot blank a visible card
+        self.image_label.image = photo
+
+
+class VirtualCardList:
+    """Renders only the visible rows of a long list on a canvas
+
+    Rows live in fixed-height slots, so the visible range is computed from
+    the scroll position alone. Cards that scroll out of view go back to a
+    free pool and are rebound to the rows scrolling in, which keeps the
+    widget count (and render time) independent of the number of items.
+
+    The pool is keyed by item_key(item). When the item list changes, a card
+    whose item is still on screen is picked up again and only moved and
+    renumbered, so applying a new result set costs a diff rather than a
+    rebuild. bind_card(card, item, row, reused) is told which case applies.
+    """
+
+    def __init__(self, canvas, create_card, bind_card, item_key=None,
+                 row_height=ROW_HEIGHT, overscan=OVERSCAN_ROWS):
+        self.canvas = canvas
+        self.create_card = create_card
+        self.bind_card = bind_card
+        self.item_key = item_key or (lambda item: item)
+        self.row_height = row_height
+        self.overscan = overscan
+        self.items = []
+        self.active = {}
+        self.free = OrderedDict()
+        self._refresh_scheduled = False
+
+        self.canvas.bind("<Configure>", self._on_configure)
+
+    def set_items(self, items, keep_scroll=False, stale_keys=()):
+        """Replace the list contents, reusing the cards of items still shown
+
+        Cards for stale_keys (items whose content changed) are fully rebound.
+        """
+        self.items = list(items)
+        # Park every card in the keyed pool; refresh() takes back those still visible
+        for row in list(self.active):
+            self._release(row)
+        for key in stale_keys:
+            if key in self.free:
+                self.free[object()] = self.free.pop(key)
+        if not keep_scroll:
+            self.canvas.yview_moveto(0)
+        self._update_scrollregion()
+        self.refresh()
+
+    def cards(self):
+        """(key, card) for every card on screen or parked in the pool"""
+        for card, window_id, key in self.active.values():
+            yield key, card
+        for key, (card, window_id) in self.free.items():
+            yield key, card
+
+    def schedule_refresh(self, *args):
+        """Coalesce scroll events into one refresh per idle cycle"""
+        if not self._refresh_scheduled:
+            self._refresh_scheduled = True
+            self.canvas.after_idle(self.refresh)
+
+    def visible_rows(self):
+        """Rows on screen plus a few above and below"""
+        top = self.canvas.canvasy(0)
+        height = max(self.canvas.winfo_height(), self.row_height)
+        first = max(0, int(top // self.row_height) - self.overscan)
+        last = min(len(self.items), int((top + height) // self.row_height) + 1 + self.overscan)
+        return range(first, last)
+
+    def refresh(self):
+        """Release rows that left the view and bind cards to rows that entered it"""
+        self._refresh_scheduled = False
+        rows = self.visible_rows()
+        for row in list(self.active):
+            if row not in rows:
+                self._release(row)
+        for row in rows:
+            if row not in self.active:
+                self._acquire(row)
+
+    def _acquire(self, row):
+        item = self.items[row]
+        key = self.item_key(item)
+        reused = key in self.free
+        if reused:
+            card, window_id = self.free.pop(key)
+        elif self.free:
+            # Recycle the card that has been out of view the longest
+            _, (card, window_id) = self.free.popitem(last=False)
+        else:
+            card = self.create_card(self.canvas)
+            window_id = self.canvas.create_window(0, 0, window=card.frame, anchor='nw')
+        self.canvas.coords(window_id, CARD_PADX, row * self.row_height + CARD_GAP // 2)
+        self.canvas.itemconfigure(
+            window_id,
+            state='normal',
+            width=self.canvas.winfo_width() - 2 * CARD_PADX,
+            height=self.row_height - CARD_GAP
+        )
+        self.bind_card(card, item, row, reused)
+        self.active[row] = (card, window_id, key)
+
+    def _release(self, row):
+        card, window_id, key = self.active.pop(row)
+        self.canvas.itemconfigure(window_id, state='hidden')
+        if key in self.free:
+            # Duplicate key: keep the older card around anonymously
+            self.free[object()] = self.free.pop(key)
+        self.free[key] = (card, window_id)
+
+    def _update_scrollregion(self):
+        self.canvas.configure(
+            scrollregion=(0, 0, self.canvas.winfo_width(), len(self.items) * self.row_height)
+        )
+
+    def _on_configure(self, event):
+        """Keep cards as wide as the canvas and fill newly exposed rows"""
+        window_ids = [entry[1] for entry in self.active.values()]
+        window_ids += [window_id for _, window_id in self.free.values()]
+        for window_id in window_ids:
+            self.canvas.itemconfigure(window_id, width=event.width - 2 * CARD_PADX)
+        self._update_scrollregion()
+        self.schedule_refresh()
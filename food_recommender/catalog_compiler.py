@@ -0,0 +1,342 @@
+"""Compile food_data.json into a compact, memory-mappable binary catalog
+
+Layout (little-endian, every section 8-byte aligned):
+
+    header      magic, version, item count, section count, source hash,
+                source size/mtime and the key of the filter thresholds
+    directory   (name, offset, length) for every section
+    columns     calories/prep_minutes (int32), carbs/protein/fat (float32),
+                vegetarian (uint8), mood index (uint16)
+    strings     <field>.off (uint64 offsets, count + 1) + <field>.dat (utf-8)
+                for name, type, image, details (full entry as JSON), moods and
+                ingredient terms
+    postings    postings.off (uint64, terms + 1) + postings.dat (uint32 food
+                ids), one ascending id list per ingredient term
+    bitsets     mood_bits and filter_bits, one bitset per mood / filter
+    rejected    JSON list of the entries skipped by the schema check
+    warnings    JSON list of the entries kept with unreadable nutrition values
+
+Usage: python catalog_compiler.py [food_data.json]
+"""
+import array
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+
+import perf
+from catalog_loader import iter_catalog
+from catalog_schema import MACROS, SCHEMA_VERSION, Rejection, format_rejections, format_warnings
+from ingredient_index import NON_VEG_PATTERN, IngredientIndex
+from recommender_engine import (
+    FILTER_NAMES, HEALTHY_CALORIES, LOW_CALORIES, QUICK_PREP_MINUTES,
+    FoodRecord, RecommenderEngine
+)
+
+MAGIC = b'FOODCAT1'
+FORMAT_VERSION = 4
+HEADER = struct.Struct('<8sIII4x32sQq32s')
+SECTION = struct.Struct('<16sQQ')
+STRING_FIELDS = ('name', 'type', 'image', 'details')
+
+
+def compiled_path(json_path):
+    """Return where the compiled form of a JSON catalog lives"""
+    return os.path.splitext(json_path)[0] + '.foodcat'
+
+
+def index_key():
+    """Hash of the filter thresholds, vegetarian terms and parsing rules baked into the compiled file"""
+    key = (f"{FILTER_NAMES}:{QUICK_PREP_MINUTES}:{HEALTHY_CALORIES}:{LOW_CALORIES}:"
+           f"{NON_VEG_PATTERN}:{SCHEMA_VERSION}")
+    return hashlib.sha256(key.encode('utf-8')).digest()
+
+
+def file_sha256(path):
+    """Hash a file in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def _pad(f):
+    f.write(b'\0' * (-f.tell() % 8))
+
+
+@perf.timed('compile_catalog')
+def compile_catalog(json_path, out_path=None):
+    """Compile a JSON (or JSON-lines) catalog into the binary format"""
+    out_path = out_path or compiled_path(json_path)
+    stat = os.stat(json_path)
+    source_hash = file_sha256(json_path)
+
+    engine = RecommenderEngine(base_dir=os.path.dirname(json_path) or '.')
+    columns = {
+        'calories': array.array('i'),
+        'prep_minutes': array.array('i'),
+        'carbs': array.array('f'),
+        'protein': array.array('f'),
+        'fat': array.array('f'),
+        'vegetarian': array.array('B'),
+        'mood': array.array('H'),
+    }
+    strings = {field: [] for field in STRING_FIELDS}
+    moods = {}
+
+    for mood, food, offset, length in iter_catalog(json_path):
+        record = engine.add_food(mood, food, (offset, length))
+        if record is None:
+            continue
+        columns['calories'].append(record.calories)
+        columns['prep_minutes'].append(record.prep_minutes)
+        for macro in MACROS:
+            columns[macro].append(getattr(record, macro))
+        columns['vegetarian'].append(record.vegetarian)
+        columns['mood'].append(moods.setdefault(mood, len(moods)))
+        strings['name'].append(record.name.encode('utf-8'))
+        strings['type'].append(record.type.encode('utf-8'))
+        strings['image'].append(record.image.encode('utf-8'))
+        strings['details'].append(json.dumps(food, separators=(',', ':')).encode('utf-8'))
+    engine.build_index()
+
+    nbytes = (len(engine) + 7) // 8
+    sections = [(name, column.tobytes()) for name, column in columns.items()]
+    strings['moods'] = [mood.encode('utf-8') for mood in moods]
+    postings = engine.ingredients.postings
+    strings['terms'] = [term.encode('utf-8') for term in postings]
+    for field, values in strings.items():
+        offsets = array.array('Q', [0])
+        for value in values:
+            offsets.append(offsets[-1] + len(value))
+        sections.append((f'{field}.off', offsets.tobytes()))
+        sections.append((f'{field}.dat', b''.join(values)))
+    posting_offsets = array.array('Q', [0])
+    for ids in postings.values():
+        posting_offsets.append(posting_offsets[-1] + len(ids))
+    sections.append(('postings.off', posting_offsets.tobytes()))
+    sections.append(('postings.dat', b''.join(ids.tobytes() for ids in postings.values())))
+    sections.append(('mood_bits', b''.join(
+        engine.mood_bits[mood].to_bytes(nbytes, 'little') for mood in moods)))
+    sections.append(('filter_bits', b''.join(
+        engine.filter_bits[name].to_bytes(nbytes, 'little') for name in FILTER_NAMES)))
+    sections.append(('rejected', json.dumps(
+        [rejection.to_list() for rejection in engine.rejected]).encode('utf-8')))
+    sections.append(('warnings', json.dumps(
+        [warning.to_list() for warning in engine.warnings]).encode('utf-8')))
+
+    # Write to a temp file and swap it in so readers never see a partial file
+    tmp_path = f'{out_path}.{os.getpid()}.tmp'
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(engine), len(sections),
+                                source_hash, stat.st_size, stat.st_mtime_ns, index_key()))
+            directory_pos = f.tell()
+            f.write(b'\0' * (SECTION.size * len(sections)))
+            directory = []
+            for name, data in sections:
+                _pad(f)
+                directory.append(SECTION.pack(name.encode('ascii'), f.tell(), len(data)))
+                f.write(data)
+            f.seek(directory_pos)
+            f.write(b''.join(directory))
+        os.replace(tmp_path, out_path)
+    except BaseException:
+        # Don't leave a partial file behind, e.g. when the target is mapped on Windows
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return out_path
+
+
+class CompiledCatalog:
+    """Read-only, memory-mapped view of a compiled catalog"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+
+        (magic, version, self.count, section_count, self.source_hash,
+         self.source_size, self.source_mtime_ns, self.index_key) = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a compiled catalog (version {FORMAT_VERSION})")
+
+        self.sections = {}
+        for i in range(section_count):
+            name, offset, length = SECTION.unpack_from(self._mmap, HEADER.size + i * SECTION.size)
+            self.sections[name.rstrip(b'\0').decode('ascii')] = (offset, length)
+
+        self._offsets = {field: self.column(f'{field}.off') for field in STRING_FIELDS + ('moods', 'terms')}
+        self.moods = [self.string('moods', i) for i in range(len(self._offsets['moods']) - 1)]
+
+    def close(self):
+        """Unmap the file; nothing built from this catalog may be used afterwards"""
+        for view in self._offsets.values():
+            view.release()
+        self._view.release()
+        self._mmap.close()
+
+    def section(self, name):
+        offset, length = self.sections[name]
+        return self._view[offset:offset + length]
+
+    def column(self, name):
+        """Return a zero-copy typed view over a numeric column"""
+        fmt = {
+            'calories': 'i', 'prep_minutes': 'i', 'carbs': 'f', 'protein': 'f',
+            'fat': 'f', 'vegetarian': 'B', 'mood': 'H'
+        }.get(name, 'Q')
+        return self.section(name).cast(fmt)
+
+    def string_span(self, field, index):
+        """Return the (offset, length) of a string inside its data section"""
+        offsets = self._offsets[field]
+        start = offsets[index]
+        return start, offsets[index + 1] - start
+
+    def strings(self, field):
+        """Every string of a field, decoded from one copy of its data section"""
+        data = bytes(self.section(f'{field}.dat'))
+        offsets = self._offsets[field].tolist()
+        return [data[start:end].decode('utf-8') for start, end in zip(offsets, offsets[1:])]
+
+    def string(self, field, index):
+        offset, length = self.string_span(field, index)
+        return bytes(self.section(f'{field}.dat')[offset:offset + length]).decode('utf-8')
+
+    def fetch(self, offset, length):
+        """Decode a full entry from the details table (CatalogSource interface)"""
+        return json.loads(bytes(self.section('details.dat')[offset:offset + length]))
+
+    def rejections(self, section='rejected'):
+        """The entries skipped when the catalog was compiled, or those kept with warnings"""
+        return [Rejection(*fields) for fields in json.loads(bytes(self.section(section)))]
+
+    def bitsets(self, name, keys):
+        """Split a concatenated bitset section into one int per key"""
+        nbytes = (self.count + 7) // 8
+        data = self.section(name)
+        return {key: int.from_bytes(data[i * nbytes:(i + 1) * nbytes], 'little')
+                for i, key in enumerate(keys)}
+
+    def is_current(self, json_path):
+        """Check the compiled file still matches its source and thresholds"""
+        if self.index_key != index_key():
+            return False
+        stat = os.stat(json_path)
+        if (stat.st_size, stat.st_mtime_ns) == (self.source_size, self.source_mtime_ns):
+            return True
+        return stat.st_size == self.source_size and file_sha256(json_path) == self.source_hash
+
+
+class CompiledRecords:
+    """Sequence of FoodRecords materialized on access from the mmapped columns"""
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self._calories = catalog.column('calories')
+        self._prep_minutes = catalog.column('prep_minutes')
+        self._macros = [catalog.column(macro) for macro in MACROS]
+        self._vegetarian = catalog.column('vegetarian')
+        self._mood = catalog.column('mood')
+
+    def __len__(self):
+        return self.catalog.count
+
+    def __getitem__(self, food_id):
+        if not 0 <= food_id < self.catalog.count:
+            raise IndexError(food_id)
+        catalog = self.catalog
+        return FoodRecord.from_fields(
+            food_id,
+            catalog.moods[self._mood[food_id]],
+            catalog.string('name', food_id),
+            sys.intern(catalog.string('type', food_id)),
+            self._prep_minutes[food_id],
+            self._calories[food_id],
+            *[column[food_id] for column in self._macros],
+            bool(self._vegetarian[food_id]),
+            sys.intern(catalog.string('image', food_id)),
+            catalog.string_span('details', food_id)
+        )
+
+    def __iter__(self):
+        for food_id in range(len(self)):
+            yield self[food_id]
+
+    def names(self):
+        return self.catalog.strings('name')
+
+    def mood(self, food_id):
+        return self.catalog.moods[self._mood[food_id]]
+
+    def raw_details(self, food_id):
+        """The entry's compact JSON, undecoded"""
+        offset, length = self.catalog.string_span('details', food_id)
+        return bytes(self.catalog.section('details.dat')[offset:offset + length])
+
+
+def engine_from_compiled(catalog, base_dir='.'):
+    """Build a RecommenderEngine backed directly by a compiled catalog"""
+    engine = RecommenderEngine(base_dir=base_dir, source=catalog)
+    engine.records = CompiledRecords(catalog)
+    engine.mood_bits = catalog.bitsets('mood_bits', catalog.moods)
+    engine.filter_bits = catalog.bitsets('filter_bits', FILTER_NAMES)
+    engine.ingredients = IngredientIndex.from_compiled(catalog)
+    engine.rejected = catalog.rejections()
+    engine.warnings = catalog.rejections('warnings')
+    engine.compiled = catalog
+    return engine
+
+
+@perf.timed('load_engine')
+def load_engine(json_path='food_data.json'):
+    """Load the engine from the compiled catalog, rebuilding it when stale
+
+    Falls back to parsing the JSON directly if the compiled file cannot be
+    written or mapped (read-only directory, big-endian host, ...).
+    """
+    base_dir = os.path.dirname(json_path) or '.'
+    # Without a compiled file the entries are kept in memory: byte spans
+    # into the live JSON would go stale as soon as it is edited
+    if sys.byteorder != 'little':
+        return RecommenderEngine.from_file(json_path, lazy=False)
+
+    bin_path = compiled_path(json_path)
+    try:
+        catalog = CompiledCatalog(bin_path)
+        if catalog.is_current(json_path):
+            return engine_from_compiled(catalog, base_dir)
+        # Unmap the stale file before compiling over it; Windows cannot
+        # replace a file that is still mapped
+        catalog.close()
+    except (OSError, ValueError, struct.error):
+        pass
+
+    if not os.path.exists(json_path):
+        raise FileNotFoundError(json_path)
+    try:
+        compile_catalog(json_path, bin_path)
+        return engine_from_compiled(CompiledCatalog(bin_path), base_dir)
+    except OSError:
+        return RecommenderEngine.from_file(json_path, lazy=False)
+
+
+if __name__ == "__main__":
+    source = sys.argv[1] if len(sys.argv) > 1 else 'food_data.json'
+    out_path = compile_catalog(source)
+    print(f"Compiled {source} -> {out_path}")
+    catalog = CompiledCatalog(out_path)
+    rejected = catalog.rejections()
+    if rejected:
+        print(format_rejections(rejected))
+    warnings = catalog.rejections('warnings')
+    if warnings:
+        print(format_warnings(warnings))
@@ -0,0 +1,167 @@
+import json
+import os
+import re
+
+CHUNK_SIZE = 64 * 1024
+NDJSON_EXTENSIONS = ('.jsonl', '.ndjson')
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = re.compile(r'[ \t\r\n]*')
+_WHITESPACE_CHARS = ' \t\r\n'
+
+
+class SourceChangedError(OSError):
+    """The catalog file changed since it was indexed, so stored byte spans no longer apply"""
+
+
+def is_ndjson(path):
+    """Check whether a catalog path uses the JSON-lines layout"""
+    return path.lower().endswith(NDJSON_EXTENSIONS)
+
+
+class _CatalogStream:
+    """Incremental reader for the {"mood": [food, ...], ...} catalog layout
+
+    Only the current chunk and the food being decoded are held in memory.
+    Byte offsets are tracked so entries can be re-read later on demand;
+    while the buffer is pure ASCII they are counted without re-encoding.
+    """
+
+    def __init__(self, f, chunk_size=CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.byte_pos = 0
+        self.ascii = True
+
+    def _fill(self):
+        """Read the next chunk, dropping text that has been consumed"""
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        self.ascii = self.buf.isascii()
+        return True
+
+    def _advance(self, end):
+        if self.ascii:
+            self.byte_pos += end - self.pos
+        else:
+            self.byte_pos += len(self.buf[self.pos:end].encode('utf-8'))
+        self.pos = end
+
+    def _error(self, msg):
+        return json.JSONDecodeError(msg, self.buf, self.pos)
+
+    def _peek(self):
+        """Return the next non-whitespace character without consuming it"""
+        while True:
+            if self.pos < len(self.buf) and self.buf[self.pos] not in _WHITESPACE_CHARS:
+                return self.buf[self.pos]
+            self._advance(_WHITESPACE.match(self.buf, self.pos).end())
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ''
+
+    def _expect(self, chars):
+        ch = self._peek()
+        if not ch or ch not in chars:
+            raise self._error(f"Expected one of {chars!r}")
+        self._advance(self.pos + 1)
+        return ch
+
+    def _decode(self):
+        """Decode one delimited value (string or object) from the stream"""
+        self._peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+                return value, end
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+
+    def __iter__(self):
+        """Yield (mood, food, byte_offset, byte_length) for every entry"""
+        self._expect('{')
+        if self._peek() == '}':
+            self._advance(self.pos + 1)
+        else:
+            yield from self._moods()
+        if self._peek():
+            raise self._error("Extra data after the catalog")
+
+    def _moods(self):
+        """Entries of every "mood": [...] member, up to and including the closing brace"""
+        while True:
+            mood, end = self._decode()
+            if not isinstance(mood, str):
+                raise self._error("Expected a mood name")
+            self._advance(end)
+            self._expect(':')
+            self._expect('[')
+            if self._peek() == ']':
+                self._advance(self.pos + 1)
+            else:
+                while True:
+                    # Non-object foods are yielded too, so the schema rejects them one by one
+                    food, end = self._decode()
+                    start = self.byte_pos
+                    self._advance(end)
+                    yield mood, food, start, self.byte_pos - start
+                    if self._expect(',]') == ']':
+                        break
+            if self._expect(',}') == '}':
+                return
+
+
+def iter_json_catalog(path, chunk_size=CHUNK_SIZE):
+    """Stream the entries of a nested JSON catalog without loading it whole"""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        yield from _CatalogStream(f, chunk_size)
+
+
+def iter_ndjson_catalog(path):
+    """Stream a JSON-lines catalog where each line is a food with a "mood" key"""
+    with open(path, 'rb') as f:
+        offset = 0
+        for line in f:
+            length = len(line)
+            if line.strip():
+                food = json.loads(line)
+                # A missing mood is reported by the schema check, not raised here
+                mood = food.get('mood') if isinstance(food, dict) else None
+                yield mood, food, offset, length
+            offset += length
+
+
+def iter_catalog(path):
+    """Stream catalog entries, picking the parser from the file extension"""
+    if is_ndjson(path):
+        return iter_ndjson_catalog(path)
+    return iter_json_catalog(path)
+
+
+class CatalogSource:
+    """Fetches full food entries lazily from their byte span in the catalog
+
+    The file's (mtime, size) is recorded before it is indexed. Once the file
+    is edited the spans point at other bytes, so fetch raises
+    SourceChangedError instead of decoding the wrong entry.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        stat = os.stat(path)
+        self.signature = stat.st_mtime_ns, stat.st_size
+
+    def fetch(self, offset, length):
+        with open(self.path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            if (stat.st_mtime_ns, stat.st_size) != self.signature:
+                raise SourceChangedError(f"{self.path} changed since it was loaded")
+            f.seek(offset)
+            return json.loads(f.read(length))
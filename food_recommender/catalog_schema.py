@@ -0,0 +1,238 @@
+"""Validate catalog entries and normalize them into typed fields at ingest
+
+Catalog files keep human-friendly text: "5 mins" or "1 hour 15 mins" for
+prep_time, "250" or "250 kcal" for calories and "30g" for the nutrition
+macros. Each entry is parsed once, when the catalog is loaded or compiled,
+into a FoodFields record of plain numbers with the units resolved, so the
+filters, the scorer and the compiled columns never re-parse strings.
+
+An entry that cannot be normalized does not stop the load. The engine
+skips it and keeps a Rejection describing every problem found, so front
+ends can report bad rows up front instead of failing on a click. Only
+name, prep_time and calories are required: a nutrition macro that is
+missing or cannot be read ("N/A", "trace", "12oz") becomes NaN, and the
+entry is kept with a warning.
+
+Usage: python catalog_schema.py [food_data.json]
+"""
+import functools
+import math
+import re
+import sys
+
+# Bump when parsing changes, so compiled catalogs are rebuilt
+SCHEMA_VERSION = 2
+
+REQUIRED_FIELDS = ('name', 'prep_time', 'calories')
+TEXT_FIELDS = ('type', 'reason', 'ingredients', 'tips', 'image')
+MACROS = ('carbs', 'protein', 'fat')
+
+# Unit spellings and their size in the field's base unit
+MINUTE_UNITS = dict.fromkeys(('', 'm', 'min', 'mins', 'minute', 'minutes'), 1.0)
+MINUTE_UNITS.update(dict.fromkeys(('h', 'hr', 'hrs', 'hour', 'hours'), 60.0))
+MINUTE_UNITS.update(dict.fromkeys(('s', 'sec', 'secs', 'second', 'seconds'), 1 / 60))
+CALORIE_UNITS = dict.fromkeys(('', 'cal', 'cals', 'calorie', 'calories', 'kcal', 'kcals'), 1.0)
+GRAM_UNITS = dict.fromkeys(('', 'g', 'gr', 'gram', 'grams'), 1.0)
+GRAM_UNITS.update(dict.fromkeys(('mg', 'milligram', 'milligrams'), 0.001))
+GRAM_UNITS.update(dict.fromkeys(('kg', 'kilogram', 'kilograms'), 1000.0))
+
+# A number or a range ("10-15"), then an optional unit
+_QUANTITY = re.compile(r'(\d+(?:\.\d+)?)(?:\s*(?:-|–|to)\s*(\d+(?:\.\d+)?))?\s*([a-z]*)')
+_THOUSANDS = re.compile(r'(?<=\d),(?=\d{3}\b)')
+
+# Distinct text values remembered per parser; catalogs repeat "10 mins" or "30g" a lot
+TEXT_CACHE_SIZE = 4096
+
+
+class SchemaError(ValueError):
+    """A catalog entry that cannot be normalized, with one message per problem"""
+
+    def __init__(self, errors):
+        super().__init__('; '.join(errors))
+        self.errors = errors
+
+
+def parse_quantity(value, units):
+    """Total of the quantities in a value such as "1 hour 15 mins", in the base unit of units
+
+    Plain numbers are taken as the base unit already. A range counts as its
+    upper bound, so "10-15 mins" is not mistaken for a quick dish.
+    """
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError(f"expected a number or text, got {type(value).__name__}")
+    if isinstance(value, str):
+        text = _THOUSANDS.sub('', value.strip().lower())
+        if text.startswith('-'):
+            raise ValueError(f"negative quantity {value!r}")
+        matches = list(_QUANTITY.finditer(text))
+        if not matches:
+            raise ValueError(f"no number in {value!r}")
+        total = 0.0
+        for match in matches:
+            low, high, unit = match.groups()
+            if unit not in units:
+                raise ValueError(f"unknown unit {unit!r} in {value!r}")
+            total += float(high or low) * units[unit]
+        return total
+    if not math.isfinite(value) or value < 0:
+        raise ValueError(f"invalid quantity {value!r}")
+    return float(value)
+
+
+def _memoize_text(parse):
+    """Cache a parser's results for text values, which repeat across a catalog"""
+    cached = functools.lru_cache(maxsize=TEXT_CACHE_SIZE)(parse)
+
+    @functools.wraps(parse)
+    def wrapper(value):
+        if isinstance(value, str):
+            return cached(value)
+        return parse(value)
+    return wrapper
+
+
+@_memoize_text
+def parse_minutes(value):
+    """Parse a prep time such as "5 mins", "1 hour" or "1h30" into whole minutes"""
+    return round(parse_quantity(value, MINUTE_UNITS))
+
+
+@_memoize_text
+def parse_calories(value):
+    """Parse calories such as "250", 250 or "1,200 kcal" into an int"""
+    return round(parse_quantity(value, CALORIE_UNITS))
+
+
+@_memoize_text
+def parse_grams(value):
+    """Parse a macro such as "30g" or "500mg" into grams, NaN when missing"""
+    if value is None or value == '':
+        return math.nan
+    return parse_quantity(value, GRAM_UNITS)
+
+
+class FoodFields:
+    """The normalized, typed fields of one catalog entry"""
+
+    __slots__ = ('name', 'type', 'prep_minutes', 'calories', 'carbs', 'protein', 'fat',
+                 'ingredients', 'image', 'warnings')
+
+    def __init__(self, name, food_type, prep_minutes, calories, carbs, protein, fat,
+                 ingredients, image, warnings=()):
+        self.name = name
+        self.type = food_type
+        self.prep_minutes = prep_minutes
+        self.calories = calories
+        self.carbs = carbs
+        self.protein = protein
+        self.fat = fat
+        self.ingredients = ingredients
+        self.image = image
+        # Problems that dropped a field without rejecting the entry
+        self.warnings = warnings
+
+
+def normalize_food(mood, food):
+    """Validate one entry and return its FoodFields, or raise SchemaError listing every problem
+
+    Macros that cannot be parsed are NaN and listed in FoodFields.warnings.
+    """
+    if not isinstance(food, dict):
+        raise SchemaError([f"expected an object, got {type(food).__name__}"])
+    errors = []
+    if not isinstance(mood, str) or not mood:
+        errors.append("missing mood")
+    for field in REQUIRED_FIELDS:
+        if food.get(field) in (None, ''):
+            errors.append(f"missing {field}")
+    name = food.get('name')
+    if name is not None and not isinstance(name, str):
+        errors.append("name: expected text")
+    for field in TEXT_FIELDS:
+        if not isinstance(food.get(field, ''), str):
+            errors.append(f"{field}: expected text")
+
+    def parsed(field, parse, value):
+        try:
+            return parse(value)
+        except ValueError as e:
+            errors.append(f"{field}: {e}")
+
+    prep_minutes = calories = None
+    if 'prep_time' in food:
+        prep_minutes = parsed('prep_time', parse_minutes, food['prep_time'])
+    if 'calories' in food:
+        calories = parsed('calories', parse_calories, food['calories'])
+    nutrition = food.get('nutrition') or {}
+    if not isinstance(nutrition, dict):
+        errors.append("nutrition: expected an object")
+        nutrition = {}
+    warnings = []
+    macros = []
+    for macro in MACROS:
+        try:
+            macros.append(parse_grams(nutrition.get(macro)))
+        except ValueError as e:
+            warnings.append(f"nutrition.{macro}: {e}")
+            macros.append(math.nan)
+
+    if errors:
+        raise SchemaError(errors + warnings)
+    return FoodFields(name, food.get('type', ''), prep_minutes, calories, *macros,
+                      food.get('ingredients', ''), food.get('image', 'default_food.jpg'),
+                      warnings)
+
+
+class Rejection:
+    """A catalog entry skipped at ingest, and why
+
+    Entries kept with a dropped field are reported the same way, as warnings.
+    """
+
+    __slots__ = ('position', 'mood', 'name', 'errors')
+
+    def __init__(self, position, mood, name, errors):
+        self.position = position
+        self.mood = mood
+        self.name = name
+        self.errors = errors
+
+    def to_list(self):
+        return [self.position, self.mood, self.name, self.errors]
+
+    def __str__(self):
+        name = self.name if isinstance(self.name, str) else '<unnamed>'
+        return f"entry {self.position} ({self.mood}/{name}): {'; '.join(self.errors)}"
+
+
+def format_rejections(rejected, limit=20, heading="malformed catalog entries skipped"):
+    """Human-readable report of the skipped entries"""
+    lines = [f"{len(rejected)} {heading}:"]
+    lines.extend(f"  {rejection}" for rejection in rejected[:limit])
+    if len(rejected) > limit:
+        lines.append(f"  ... and {len(rejected) - limit} more")
+    return '\n'.join(lines)
+
+
+def format_warnings(warnings, limit=20):
+    """Human-readable report of the entries kept with unreadable fields"""
+    return format_rejections(warnings, limit, "catalog entries kept without some nutrition values")
+
+
+def main(argv=None):
+    from recommender_engine import RecommenderEngine
+
+    argv = sys.argv[1:] if argv is None else argv
+    path = argv[0] if argv else 'food_data.json'
+    engine = RecommenderEngine.from_file(path)
+    print(f"{path}: {len(engine)} valid entries")
+    if engine.warnings:
+        print(format_warnings(engine.warnings, limit=len(engine.warnings)))
+    if engine.rejected:
+        print(format_rejections(engine.rejected, limit=len(engine.rejected)))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
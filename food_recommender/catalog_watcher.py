@@ -0,0 +1,117 @@
+import json
+import os
+import threading
+
+from catalog_compiler import load_engine
+
+POLL_INTERVAL = 1.0
+
+
+class CatalogDiff:
+    """Food names added, removed or changed between two catalog versions"""
+
+    def __init__(self, added, removed, changed):
+        self.added = added
+        self.removed = removed
+        self.changed = changed
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed)
+
+    def __repr__(self):
+        return (f"CatalogDiff(added={len(self.added)}, removed={len(self.removed)}, "
+                f"changed={len(self.changed)})")
+
+
+def source_signature(engine):
+    """(mtime, size) of the source file a compiled engine was built from, None otherwise"""
+    compiled = getattr(engine, 'compiled', None)
+    if compiled is None:
+        return None
+    return compiled.source_mtime_ns, compiled.source_size
+
+
+def diff_catalogs(old, new):
+    """Compare two engines food by food, keyed by name
+
+    Entries are compared as raw JSON bytes, never decoded, and the old
+    engine's source file is not re-read. A food whose old entry cannot be
+    compared that way counts as changed.
+    """
+    old_entries = old.name_index
+    new_entries = new.name_index
+    added = new_entries.keys() - old_entries.keys()
+    removed = old_entries.keys() - new_entries.keys()
+    changed = set()
+    for name in old_entries.keys() & new_entries.keys():
+        old_foods = [old.fingerprint(i) for i in old_entries[name]]
+        new_foods = [new.fingerprint(i) for i in new_entries[name]]
+        if None in old_foods or old_foods != new_foods:
+            changed.add(name)
+    return CatalogDiff(added, removed, changed)
+
+
+class CatalogWatcher:
+    """Polls the catalog's mtime and size and reloads it in the background
+
+    on_reload(engine, diff) is called from the watcher thread with a fully
+    built engine, so callers can swap it in with a single assignment. A
+    catalog that fails to parse is reported through on_error(exc) and the
+    caller keeps serving the previous version.
+    """
+
+    def __init__(self, path, engine, on_reload, on_error=None, interval=POLL_INTERVAL,
+                 loader=load_engine):
+        self.path = path
+        self.engine = engine
+        self.on_reload = on_reload
+        self.on_error = on_error
+        self.interval = interval
+        self.loader = loader
+        # Compare against the file the engine was built from, so an edit made
+        # between loading and starting the watcher is not missed
+        self._signature = source_signature(engine) or self._stat()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True, name="catalog-watcher")
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                # Keep watching; a failure on one edit must not end hot reload
+                if self.on_error:
+                    self.on_error(e)
+
+    def check(self):
+        """Reload the catalog if the file changed since the last check"""
+        signature = self._stat()
+        if signature is None or signature == self._signature:
+            return False
+        # Remember the signature even if parsing fails, so a bad edit is reported once
+        self._signature = signature
+        try:
+            engine = self.loader(self.path)
+            diff = diff_catalogs(self.engine, engine)
+        except (json.JSONDecodeError, KeyError, ValueError, IndexError, OSError) as e:
+            if self.on_error:
+                self.on_error(e)
+            return False
+        self.engine = engine
+        self.on_reload(engine, diff)
+        return True
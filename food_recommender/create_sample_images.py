@@ -1,61 +1,202 @@
-from PIL import Image, ImageDraw, ImageFont
+"""Render placeholder images for every food in the catalog
+
+The item list comes from food_data.json (or a JSON-lines catalog), one
+placeholder per distinct image path. Rendering and JPEG encoding run
+across a process pool, and the output is deterministic: the same name,
+colour and size always give the same bytes.
+
+Each placeholder records a hash of its inputs in the JPEG comment, so
+re-runs skip files that are already current. Files without that marker
+are real photos and are never overwritten unless --force is given. With
+--thumbnails the thumbnail the GUI displays is written straight into the
+thumbnail cache too, so the first launch needs no decode or resize.
+
+Usage: python create_sample_images.py [food_data.json] [--workers N] [--thumbnails] [--force]
+"""
+import argparse
+import colorsys
+import hashlib
 import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image, ImageDraw
+
+from catalog_loader import iter_catalog
+from image_loader import THUMBNAIL_SIZE
+
+IMAGE_SIZE = (400, 300)
+DEFAULT_IMAGE = 'default_food.jpg'
+JPEG_QUALITY = 90
+
+# Bump when the drawing code changes so existing placeholders are re-rendered
+RENDER_VERSION = 1
+MARKER = b'food-placeholder:'
+
+# Hand-picked colours of the original sample set, by image file stem
+SAMPLE_COLORS = {
+    'chocolate_ice_cream': '#8B4513',
+    'pizza_margherita': '#FF6347',
+    'fruit_smoothie_bowl': '#FF69B4',
+    'sushi_platter': '#DC143C',
+    'mac_cheese': '#FFD700',
+    'chicken_soup': '#DAA520',
+    'hot_chocolate': '#8B4513',
+    'mashed_potatoes': '#F5F5DC',
+    'green_tea': '#32CD32',
+    'dark_chocolate': '#2F4F4F',
+    'oatmeal_berries': '#DEB887',
+    'avocado_toast': '#9ACD32',
+    'banana_smoothie': '#FFFF00',
+    'mixed_nuts': '#A0522D',
+    'energy_bars': '#D2691E',
+    'coffee_snack': '#8B4513'
+}
+
+
+def item_color(image, name):
+    """The original colour for known items, otherwise one derived from the name"""
+    stem = os.path.splitext(os.path.basename(image))[0]
+    if stem in SAMPLE_COLORS:
+        return SAMPLE_COLORS[stem]
+    hue = (zlib.crc32(name.encode('utf-8')) % 360) / 360
+    r, g, b = colorsys.hsv_to_rgb(hue, 0.55, 0.75)
+    return f'#{int(r * 255):02X}{int(g * 255):02X}{int(b * 255):02X}'
+
+
+def wrap_name(name):
+    """Split a name over two lines at the word break closest to its middle"""
+    words = name.split()
+    if len(words) < 2:
+        return name
+    best = min(range(1, len(words)),
+               key=lambda i: abs(len(' '.join(words[:i])) - len(' '.join(words[i:]))))
+    return ' '.join(words[:best]) + '\n' + ' '.join(words[best:])
+
+
+def catalog_items(catalog_path):
+    """{image path: (text, colour)} for every distinct image in the catalog"""
+    items = {}
+    for mood, food, offset, length in iter_catalog(catalog_path):
+        if not isinstance(food, dict):
+            continue
+        image = food.get('image', DEFAULT_IMAGE)
+        if image != DEFAULT_IMAGE and image not in items:
+            items[image] = (wrap_name(food['name']), item_color(image, food['name']))
+    return items
+
+
+def render_signature(text, color, size=IMAGE_SIZE):
+    ident = f"{RENDER_VERSION}|{text}|{color}|{size[0]}x{size[1]}"
+    return MARKER + hashlib.sha1(ident.encode('utf-8')).hexdigest().encode('ascii')
+
+
+def existing_signature(path):
+    """The placeholder marker in a JPEG's comment, b'' for other files, None if missing"""
+    try:
+        with Image.open(path) as image:
+            comment = image.info.get('comment', b'')
+    except FileNotFoundError:
+        return None
+    except OSError:
+        return b''
+    return comment if comment.startswith(MARKER) else b''
 
-def create_sample_images():
-    """Create simple placeholder images for the food recommender"""
-    
-    # Create images directory
-    os.makedirs('images', exist_ok=True)
-    
-    # Food items and their colors
-    food_items = {
-        'chocolate_ice_cream': ('Chocolate\nIce Cream', '#8B4513'),
-        'pizza_margherita': ('Pizza\nMargherita', '#FF6347'),
-        'fruit_smoothie_bowl': ('Fruit\nSmoothie Bowl', '#FF69B4'),
-        'sushi_platter': ('Sushi\nPlatter', '#DC143C'),
-        'mac_cheese': ('Mac &\nCheese', '#FFD700'),
-        'chicken_soup': ('Chicken\nSoup', '#DAA520'),
-        'hot_chocolate': ('Hot\nChocolate', '#8B4513'),
-        'mashed_potatoes': ('Mashed\nPotatoes', '#F5F5DC'),
-        'green_tea': ('Green\nTea', '#32CD32'),
-        'dark_chocolate': ('Dark\nChocolate', '#2F4F4F'),
-        'oatmeal_berries': ('Oatmeal\nBerries', '#DEB887'),
-        'avocado_toast': ('Avocado\nToast', '#9ACD32'),
-        'banana_smoothie': ('Banana\nSmoothie', '#FFFF00'),
-        'mixed_nuts': ('Mixed\nNuts', '#A0522D'),
-        'energy_bars': ('Energy\nBars', '#D2691E'),
-        'coffee_snack': ('Coffee &\nSnack', '#8B4513')
-    }
-    
-    for filename, (text, color) in food_items.items():
-        # Create a new image with a nice background
-        img = Image.new('RGB', (400, 300), color=color)
-        draw = ImageDraw.Draw(img)
-        
-        # Add food emoji
-        draw.text((200, 100), "🍽️", fill='white', anchor="mm", font_size=40)
-        
-        # Add food name
-        draw.text((200, 180), text, fill='white', anchor="mm", font_size=20, 
-                 stroke_width=1, stroke_fill='black')
-        
-        # Add decorative border
-        draw.rectangle([5, 5, 395, 295], outline='white', width=3)
-        
-        # Save image
-        img.save(f'images/{filename}.jpg')
-        print(f"Created: images/{filename}.jpg")
-    
-    # Create default food image
-    default_img = Image.new('RGB', (400, 300), color='#4682B4')
-    draw = ImageDraw.Draw(default_img)
-    draw.text((200, 150), "🍽️\nFood Image\nNot Available", fill='white', 
-             anchor="mm", font_size=24, align='center')
-    default_img.save('default_food.jpg')
-    print("Created: default_food.jpg")
-    
-    print("\n✅ All sample images created successfully!")
+
+def render(text, color, default=False, size=IMAGE_SIZE):
+    """Draw one placeholder"""
+    width, height = size
+    img = Image.new('RGB', size, color=color)
+    draw = ImageDraw.Draw(img)
+    if default:
+        draw.text((width // 2, height // 2), text, fill='white',
+                  anchor="mm", font_size=24, align='center')
+        return img
+
+    # Add food emoji
+    draw.text((width // 2, height // 3), "🍽️", fill='white', anchor="mm", font_size=40)
+
+    # Add food name
+    draw.text((width // 2, height * 3 // 5), text, fill='white', anchor="mm", font_size=20,
+              stroke_width=1, stroke_fill='black', align='center')
+
+    # Add decorative border
+    draw.rectangle([5, 5, width - 5, height - 5], outline='white', width=3)
+    return img
+
+
+def render_file(path, text, color, default=False, thumbnail_size=None):
+    """Render and save one placeholder (runs in a worker process)
+
+    Returns the thumbnail's raw RGB bytes when thumbnail_size is given.
+    """
+    img = render(text, color, default)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    img.save(tmp_path, 'JPEG', quality=JPEG_QUALITY, comment=render_signature(text, color))
+    os.replace(tmp_path, path)
+    if thumbnail_size:
+        return img.resize(thumbnail_size, Image.Resampling.LANCZOS).tobytes()
+    return None
+
+
+def create_sample_images(catalog_path='food_data.json', workers=None, thumbnails=False, force=False):
+    """Render every missing or outdated placeholder for the catalog"""
+    base_dir = os.path.dirname(catalog_path) or '.'
+    items = {DEFAULT_IMAGE: ("🍽️\nFood Image\nNot Available", '#4682B4')}
+    items.update(catalog_items(catalog_path))
+
+    cache = None
+    if thumbnails:
+        from thumbnail_cache import CACHE_DIR, ThumbnailCache
+        cache = ThumbnailCache(os.path.join(base_dir, CACHE_DIR))
+
+    jobs = {}
+    kept = []
+    for image, (text, color) in items.items():
+        path = os.path.join(base_dir, image)
+        signature = existing_signature(path)
+        if signature == render_signature(text, color):
+            kept.append(path)
+        elif signature == b'' and not force:
+            # A real photo, not a placeholder of ours
+            kept.append(path)
+        else:
+            jobs[path] = (text, color, image == DEFAULT_IMAGE)
+
+    with ProcessPoolExecutor(workers) as pool:
+        futures = {
+            pool.submit(render_file, path, text, color, default, THUMBNAIL_SIZE if cache else None): path
+            for path, (text, color, default) in jobs.items()
+        }
+        for future, path in futures.items():
+            data = future.result()
+            if cache is not None:
+                cache.put(path, Image.frombytes('RGB', THUMBNAIL_SIZE, data))
+            print(f"Created: {path}")
+
+    if cache is not None:
+        # Current files may still be missing from the cache
+        for path in kept:
+            cache.load(path)
+
+    print(f"\n✅ {len(jobs)} sample images created, {len(kept)} already up to date or real photos.")
+    if not thumbnails:
+        print("🖼️ Prewarm thumbnails with: python thumbnail_cache.py prewarm")
     print("🎯 You can now run: python main.py")
+    return jobs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render placeholder images for the catalog")
+    parser.add_argument('catalog', nargs='?', default='food_data.json')
+    parser.add_argument('--workers', type=int, default=None, help="render processes (default: CPU count)")
+    parser.add_argument('--thumbnails', action='store_true',
+                        help="also write the GUI thumbnails straight into the thumbnail cache")
+    parser.add_argument('--force', action='store_true', help="replace real photos with placeholders too")
+    args = parser.parse_args(argv)
+    create_sample_images(args.catalog, args.workers, args.thumbnails, args.force)
+
 
 if __name__ == "__main__":
-    create_sample_images()
\ No newline at end of file
+    main()
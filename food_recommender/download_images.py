@@ -1,52 +1,197 @@
+"""Download the food photos concurrently, skipping files that are already current
+
+Fetches run on a bounded thread pool sharing one requests.Session, so
+connections are pooled and kept alive. Transient failures (connection
+errors, 429 and 5xx) are retried with exponential backoff. Decoding and
+resizing happen in a process pool so they never hold up the fetch threads.
+
+A manifest next to the images remembers each file's URL, ETag,
+Last-Modified, size and SHA-256. A file whose size and hash still match
+is revalidated with a conditional request and left alone on 304, or not
+requested at all with --no-revalidate.
+
+Usage: python download_images.py [--dest DIR] [--workers N] [--no-revalidate]
+"""
+import argparse
+import hashlib
+import io
+import json
 import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
 import requests
-from PIL import Image
-import io
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+IMAGE_URLS = {
+    'chocolate_ice_cream.jpg': 'https://images.unsplash.com/photo-1563805042-7684c019e1cb?w=400&h=300&fit=crop',
+    'pizza_margherita.jpg': 'https://images.unsplash.com/photo-1604068549290-dea0e4a305ca?w=400&h=300&fit=crop',
+    'fruit_smoothie_bowl.jpg': 'https://images.unsplash.com/photo-1511690743698-d9d85f2fbf38?w=400&h=300&fit=crop',
+    'sushi_platter.jpg': 'https://images.unsplash.com/photo-1579584425555-c3ce17fd4351?w=400&h=300&fit=crop',
+    'mac_cheese.jpg': 'https://images.unsplash.com/photo-1543339312-28c4996f5f27?w=400&h=300&fit=crop',
+    'chicken_soup.jpg': 'https://images.unsplash.com/photo-1547592166-23ac45744acd?w=400&h=300&fit=crop',
+    'hot_chocolate.jpg': 'https://images.unsplash.com/photo-1572490122747-3968b75cc699?w=400&h=300&fit=crop',
+    'mashed_potatoes.jpg': 'https://images.unsplash.com/photo-1594212699903-ec8a3eca50f5?w=400&h=300&fit=crop',
+    'green_tea.jpg': 'https://images.unsplash.com/photo-1556679343-c7306c1976bc?w=400&h=300&fit=crop',
+    'dark_chocolate.jpg': 'https://images.unsplash.com/photo-1588196749597-9ff075ee6b5b?w=400&h=300&fit=crop',
+    'oatmeal_berries.jpg': 'https://images.unsplash.com/photo-1574323347407-f5e1ad6d020b?w=400&h=300&fit=crop',
+    'avocado_toast.jpg': 'https://images.unsplash.com/photo-1541519227354-08fa5d50c44d?w=400&h=300&fit=crop',
+    'banana_smoothie.jpg': 'https://images.unsplash.com/photo-1570197788417-0e82375c9371?w=400&h=300&fit=crop',
+    'mixed_nuts.jpg': 'https://images.unsplash.com/photo-1611854778585-e5d6d11b598b?w=400&h=300&fit=crop',
+    'energy_bars.jpg': 'https://images.unsplash.com/photo-1586201375761-83865001e31c?w=400&h=300&fit=crop',
+    'coffee_snack.jpg': 'https://images.unsplash.com/photo-1495474472287-4d71bcdd2085?w=400&h=300&fit=crop',
+    'default_food.jpg': 'https://images.unsplash.com/photo-1546069901-ba9599a7e63c?w=400&h=300&fit=crop'
+}
+
+IMAGE_SIZE = (400, 300)
+MANIFEST_NAME = '.download_manifest.json'
+DEFAULT_WORKERS = 8
+TIMEOUT = (5, 30)
+RETRIES = 3
+BACKOFF_FACTOR = 0.5
+
+
+def image_destination(filename, dest='.'):
+    """default_food.jpg lives next to the code, everything else under images/"""
+    if filename == 'default_food.jpg':
+        return os.path.join(dest, filename)
+    return os.path.join(dest, 'images', filename)
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_matches(path, entry):
+    """True if path still holds exactly the file the manifest entry describes"""
+    try:
+        if os.path.getsize(path) != entry.get('size'):
+            return False
+    except OSError:
+        return False
+    return file_sha256(path) == entry.get('sha256')
+
+
+def make_session(workers=DEFAULT_WORKERS, retries=RETRIES, backoff_factor=BACKOFF_FACTOR):
+    """A Session with a connection pool per host sized for the thread pool"""
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(['GET'])
+    )
+    adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers, max_retries=retry)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def resize_and_save(content, path, size=IMAGE_SIZE):
+    """Decode, resize and atomically write one image (runs in a worker process)
 
-def download_default_images():
-    """Download placeholder images from Unsplash"""
-    image_urls = {
-        'chocolate_ice_cream.jpg': 'https://images.unsplash.com/photo-1563805042-7684c019e1cb?w=400&h=300&fit=crop',
-        'pizza_margherita.jpg': 'https://images.unsplash.com/photo-1604068549290-dea0e4a305ca?w=400&h=300&fit=crop',
-        'fruit_smoothie_bowl.jpg': 'https://images.unsplash.com/photo-1511690743698-d9d85f2fbf38?w=400&h=300&fit=crop',
-        'sushi_platter.jpg': 'https://images.unsplash.com/photo-1579584425555-c3ce17fd4351?w=400&h=300&fit=crop',
-        'mac_cheese.jpg': 'https://images.unsplash.com/photo-1543339312-28c4996f5f27?w=400&h=300&fit=crop',
-        'chicken_soup.jpg': 'https://images.unsplash.com/photo-1547592166-23ac45744acd?w=400&h=300&fit=crop',
-        'hot_chocolate.jpg': 'https://images.unsplash.com/photo-1572490122747-3968b75cc699?w=400&h=300&fit=crop',
-        'mashed_potatoes.jpg': 'https://images.unsplash.com/photo-1594212699903-ec8a3eca50f5?w=400&h=300&fit=crop',
-        'green_tea.jpg': 'https://images.unsplash.com/photo-1556679343-c7306c1976bc?w=400&h=300&fit=crop',
-        'dark_chocolate.jpg': 'https://images.unsplash.com/photo-1588196749597-9ff075ee6b5b?w=400&h=300&fit=crop',
-        'oatmeal_berries.jpg': 'https://images.unsplash.com/photo-1574323347407-f5e1ad6d020b?w=400&h=300&fit=crop',
-        'avocado_toast.jpg': 'https://images.unsplash.com/photo-1541519227354-08fa5d50c44d?w=400&h=300&fit=crop',
-        'banana_smoothie.jpg': 'https://images.unsplash.com/photo-1570197788417-0e82375c9371?w=400&h=300&fit=crop',
-        'mixed_nuts.jpg': 'https://images.unsplash.com/photo-1611854778585-e5d6d11b598b?w=400&h=300&fit=crop',
-        'energy_bars.jpg': 'https://images.unsplash.com/photo-1586201375761-83865001e31c?w=400&h=300&fit=crop',
-        'coffee_snack.jpg': 'https://images.unsplash.com/photo-1495474472287-4d71bcdd2085?w=400&h=300&fit=crop',
-        'default_food.jpg': 'https://images.unsplash.com/photo-1546069901-ba9599a7e63c?w=400&h=300&fit=crop'
+    Returns the written file's size and SHA-256 for the manifest.
+    """
+    from PIL import Image
+
+    image = Image.open(io.BytesIO(content))
+    image = image.convert('RGB').resize(size, Image.Resampling.LANCZOS)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    image.save(tmp_path, 'JPEG')
+    os.replace(tmp_path, path)
+    return os.path.getsize(path), file_sha256(path)
+
+
+def load_manifest(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(path, manifest):
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def fetch_image(session, processes, filename, url, path, entry, revalidate=True, size=IMAGE_SIZE):
+    """Fetch one image if it changed; returns (status, manifest entry or None)"""
+    headers = {}
+    if entry and entry.get('url') == url and file_matches(path, entry):
+        if not revalidate:
+            return 'skipped', entry
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+
+    response = session.get(url, headers=headers, timeout=TIMEOUT)
+    if response.status_code == 304:
+        return 'not modified', entry
+    if response.status_code != 200:
+        return f'failed ({response.status_code})', None
+
+    file_size, sha256 = processes.submit(resize_and_save, response.content, path, size).result()
+    return 'downloaded', {
+        'url': url,
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        'size': file_size,
+        'sha256': sha256,
     }
-    
-    # Create images directory
-    os.makedirs('images', exist_ok=True)
-    
-    for filename, url in image_urls.items():
-        try:
-            response = requests.get(url)
-            if response.status_code == 200:
-                image = Image.open(io.BytesIO(response.content))
-                image = image.resize((400, 300), Image.Resampling.LANCZOS)
-                
-                if filename == 'default_food.jpg':
-                    image.save(filename)
-                else:
-                    image.save(f'images/{filename}')
-                
-                print(f"Downloaded: {filename}")
-            else:
-                print(f"Failed to download: {filename}")
-        except Exception as e:
-            print(f"Error downloading {filename}: {e}")
-    
-    print("Image download completed!")
+
+
+def download_default_images(urls=None, dest='.', workers=DEFAULT_WORKERS, revalidate=True,
+                            session=None, size=IMAGE_SIZE):
+    """Download every image concurrently and return a count per outcome"""
+    urls = IMAGE_URLS if urls is None else urls
+    os.makedirs(os.path.join(dest, 'images'), exist_ok=True)
+    manifest_path = os.path.join(dest, 'images', MANIFEST_NAME)
+    manifest = load_manifest(manifest_path)
+    session = session or make_session(workers)
+    counts = {}
+
+    with ProcessPoolExecutor() as processes, ThreadPoolExecutor(workers) as threads:
+        futures = {
+            threads.submit(fetch_image, session, processes, filename, url,
+                           image_destination(filename, dest), manifest.get(filename),
+                           revalidate, size): filename
+            for filename, url in urls.items()
+        }
+        for future, filename in futures.items():
+            try:
+                status, entry = future.result()
+            except (requests.RequestException, OSError, ValueError) as e:
+                status, entry = f'error: {e}', None
+            if entry is not None:
+                manifest[filename] = entry
+            outcome = status.split(' (')[0].split(':')[0]
+            counts[outcome] = counts.get(outcome, 0) + 1
+            print(f"{filename}: {status}")
+
+    save_manifest(manifest_path, manifest)
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Download the food images")
+    parser.add_argument('--dest', default='.', help="folder holding default_food.jpg and images/")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    parser.add_argument('--no-revalidate', dest='revalidate', action='store_false',
+                        help="trust files matching the manifest without asking the server")
+    args = parser.parse_args(argv)
+
+    counts = download_default_images(dest=args.dest, workers=args.workers, revalidate=args.revalidate)
+    print(f"Image download completed! {counts}")
+    print("Prewarm thumbnails with: python thumbnail_cache.py prewarm")
+
 
 if __name__ == "__main__":
-    download_default_images()
\ No newline at end of file
+    main()
@@ -0,0 +1,204 @@
+import itertools
+import os
+import queue
+import threading
+from collections import OrderedDict
+
+import perf
+
+THUMBNAIL_SIZE = (200, 150)
+
+# Decoded PhotoImages kept around beyond the ones currently on screen
+MAX_CACHED_IMAGES = 64
+
+
+def file_signature(path):
+    """(mtime, size) of a file, or None if it is missing"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def preload_pil():
+    """Import Pillow ahead of the first decode (it is imported lazily to keep startup fast)"""
+    import PIL.Image
+    import PIL.ImageTk
+
+
+def decode_thumbnail(path, size=THUMBNAIL_SIZE):
+    """Open and resize an image to thumbnail size (safe to call off the Tk thread)"""
+    from PIL import Image
+
+    with Image.open(path) as image:
+        # Let the JPEG decoder downscale while decoding when it can
+        image.draft('RGB', size)
+        return image.convert('RGB').resize(size, Image.Resampling.LANCZOS)
+
+
+class ImageLoader:
+    """Decodes thumbnails on worker threads and hands them to Tk through a queue
+
+    Pillow releases the GIL while decoding and resampling, so the workers run
+    in parallel. Only the PhotoImage creation happens on the Tk thread, in
+    small batches scheduled with root.after so the UI stays responsive. With
+    a ThumbnailCache attached, warm starts read pre-resized buffers instead,
+    and with an ImageAtlas attached packed thumbnails are cropped from an
+    atlas decoded once.
+
+    The newest requests are decoded first, so after a fast scroll the cards
+    now on screen do not wait behind rows already scrolled past, and a card
+    that is rebound cancels the request it no longer needs.
+
+    Decoded PhotoImages are kept in a bounded LRU. Widgets showing an image
+    hold their own reference to it, so eviction never blanks a visible card;
+    it only lets off-screen images be garbage collected.
+    """
+
+    def __init__(self, root, workers=4, poll_ms=30, batch_size=8, cache=None,
+                 max_images=MAX_CACHED_IMAGES, atlas=None):
+        self.root = root
+        self.cache = cache
+        self.atlas = atlas
+        self.poll_ms = poll_ms
+        self.batch_size = batch_size
+        self.max_images = max_images
+        self.images = OrderedDict()
+        self._paths = {}
+        self._callbacks = {}
+        self._started = set()
+        self._failed = set()
+        self._signatures = {}
+        # Order of the latest request per key; older queue entries are skipped
+        self._wanted = {}
+        self._pending = queue.LifoQueue()
+        self._results = queue.Queue()
+        self._order = itertools.count()
+        self._lock = threading.Lock()
+        self._closed = False
+
+        self._threads = [
+            threading.Thread(target=self._worker, daemon=True, name=f"image-loader-{i}")
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+        self._after_id = self.root.after(self.poll_ms, self._poll)
+
+    def request(self, key, path=None, callback=None):
+        """Queue an image for decoding
+
+        callback(photo) runs on the Tk thread once the image is ready, or with
+        None if it could not be decoded. Requesting a key again moves it to
+        the front of the queue.
+        """
+        if key in self.images or key in self._failed or (path is None and key not in self._paths):
+            if callback:
+                callback(self.get(key))
+            return
+        if callback:
+            self._callbacks.setdefault(key, []).append(callback)
+        if path is not None:
+            self._paths[key] = path
+        order = next(self._order)
+        with self._lock:
+            self._wanted[key] = order
+        self._pending.put((order, key))
+
+    def cancel(self, key, callback):
+        """Withdraw a callback, dropping the queued decode if nothing else waits for it"""
+        callbacks = self._callbacks.get(key, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+        if not callbacks:
+            self._callbacks.pop(key, None)
+            with self._lock:
+                self._wanted.pop(key, None)
+
+    def get(self, key, default=None):
+        """Return a decoded image, marking it as recently used"""
+        if key not in self.images:
+            return default
+        self.images.move_to_end(key)
+        return self.images[key]
+
+    def _store(self, key, photo):
+        self.images[key] = photo
+        self.images.move_to_end(key)
+        while len(self.images) > self.max_images:
+            self.images.popitem(last=False)
+
+    def _worker(self):
+        while True:
+            order, key = self._pending.get()
+            if key is None:
+                return
+            with self._lock:
+                latest = self._wanted.get(key) == order
+                if latest:
+                    del self._wanted[key]
+                # Skip superseded or cancelled entries and images that are already decoded
+                if not latest or key in self._started or key in self.images:
+                    continue
+                self._started.add(key)
+            path = self._paths[key]
+            signature = file_signature(path)
+            try:
+                with perf.timer('load_images.decode'):
+                    image = self.atlas.tile(path) if self.atlas else None
+                    if image is not None:
+                        perf.count('image_atlas.hit')
+                    elif self.cache:
+                        image = self.cache.load(path)
+                    else:
+                        image = decode_thumbnail(path)
+            except Exception as e:
+                print(f"Error loading image {path}: {e}")
+                image = None
+            self._results.put((key, image, signature))
+
+    def _poll(self):
+        """Turn decoded images into PhotoImages on the Tk thread"""
+        from PIL import ImageTk
+
+        for _ in range(self.batch_size):
+            try:
+                key, image, signature = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._signatures[key] = signature
+            if image is None:
+                self._failed.add(key)
+                photo = None
+            else:
+                with perf.timer('load_images.photo'):
+                    photo = ImageTk.PhotoImage(image)
+                self._store(key, photo)
+            # Allow the key to be decoded again if it is evicted later
+            with self._lock:
+                self._started.discard(key)
+            for callback in self._callbacks.pop(key, []):
+                callback(photo)
+        if not self._closed:
+            self._after_id = self.root.after(self.poll_ms, self._poll)
+
+    def drop_stale(self):
+        """Forget decoded (or failed) images whose file changed on disk
+
+        Returns the dropped keys; they are decoded again on their next request.
+        """
+        stale = set()
+        for key in list(self.images) + list(self._failed):
+            if file_signature(self._paths[key]) != self._signatures.get(key):
+                self.images.pop(key, None)
+                self._failed.discard(key)
+                stale.add(key)
+        return stale
+
+    def shutdown(self):
+        """Stop the worker threads and the polling loop"""
+        self._closed = True
+        self.root.after_cancel(self._after_id)
+        for _ in self._threads:
+            self._pending.put((next(self._order), None))
@@ -0,0 +1,108 @@
+"""Inverted index from ingredient terms to the foods that contain them
+
+Ingredient strings are tokenized once into whole ingredient phrases
+("fish sauce") and their individual words ("fish", "sauce"), with simple
+plural folding ("berries" -> "berry"). Each term maps to a sorted posting
+list of food ids, so vegetarian checks, allergen exclusions and "must
+contain" queries touch only the foods that match instead of re-scanning
+every ingredients string.
+"""
+import array
+import functools
+import re
+
+# Word stems that make a dish non-vegetarian. Compounds starting with one
+# count too ("meatballs", "meatloaf", "porkchop"), as does any word ending
+# in "fish" ("shellfish", "catfish")
+NON_VEG_TERMS = frozenset([
+    'chicken', 'fish', 'meat', 'beef', 'pork', 'bacon', 'ham', 'lamb', 'mutton',
+    'turkey', 'duck', 'veal', 'sausage', 'salami', 'pepperoni', 'prosciutto',
+    'salmon', 'tuna', 'cod', 'anchovy', 'sardine', 'shrimp', 'prawn', 'crab',
+    'lobster', 'clam', 'mussel', 'oyster', 'squid', 'octopus', 'gelatin', 'lard',
+])
+
+NON_VEG_PATTERN = r'(?:%s)[a-z]*|[a-z]*fish' % '|'.join(sorted(NON_VEG_TERMS))
+_NON_VEG_WORD = re.compile(NON_VEG_PATTERN)
+
+_WORD = re.compile(r"[a-z]+")
+_NOISE_WORDS = frozenset(['optional', 'fresh', 'and', 'or', 'with', 'of'])
+
+# Normalized phrases remembered; the same ingredients recur across many foods
+TERM_CACHE_SIZE = 16384
+
+
+def singular(word):
+    """Fold simple English plurals so "berries" and "berry" share a term"""
+    if len(word) > 4 and word.endswith('ies'):
+        return word[:-3] + 'y'
+    if len(word) > 4 and word.endswith(('ches', 'shes', 'sses', 'xes', 'oes')):
+        return word[:-2]
+    if len(word) > 3 and word.endswith('s') and not word.endswith(('ss', 'us')):
+        return word[:-1]
+    return word
+
+
+@functools.lru_cache(maxsize=TERM_CACHE_SIZE)
+def normalize_term(text):
+    """Normalize a phrase the same way ingredients are indexed"""
+    words = [singular(word) for word in _WORD.findall(text.lower()) if word not in _NOISE_WORDS]
+    return ' '.join(words)
+
+
+def tokenize(ingredients):
+    """Return the set of phrase and word terms for an ingredients string"""
+    terms = set()
+    for part in ingredients.split(','):
+        phrase = normalize_term(part)
+        if phrase:
+            terms.add(phrase)
+            terms.update(phrase.split())
+    return terms
+
+
+def is_vegetarian(terms):
+    """Whether no word term starts with a non-vegetarian stem or ends in 'fish'"""
+    return not any(_NON_VEG_WORD.fullmatch(term) for term in terms if ' ' not in term)
+
+
+def parse_terms(text):
+    """Split user input such as "peanuts, milk" into normalized terms"""
+    return tuple(sorted({term for term in map(normalize_term, text.split(',')) if term}))
+
+
+class IngredientIndex:
+    """Maps ingredient terms to ascending posting lists of food ids"""
+
+    def __init__(self, postings=None):
+        self.postings = postings or {}
+
+    def add(self, food_id, terms):
+        """Index one food; ids must be added in ascending order"""
+        for term in terms:
+            ids = self.postings.get(term)
+            if ids is None:
+                ids = self.postings[term] = array.array('I')
+            ids.append(food_id)
+
+    @classmethod
+    def from_compiled(cls, catalog):
+        """Zero-copy postings over a compiled catalog's terms and postings sections"""
+        ids = catalog.section('postings.dat').cast('I')
+        offsets = catalog.column('postings.off')
+        postings = {}
+        for i in range(len(offsets) - 1):
+            postings[catalog.string('terms', i)] = ids[offsets[i]:offsets[i + 1]]
+        return cls(postings)
+
+    def lookup(self, term):
+        """Ids of the foods containing a term (phrase or single word)"""
+        return self.postings.get(normalize_term(term), ())
+
+    def count(self, term):
+        return len(self.lookup(term))
+
+    def __contains__(self, term):
+        return normalize_term(term) in self.postings
+
+    def __len__(self):
+        return len(self.postings)
@@ -1,94 +1,284 @@
+import perf
+
+# Startup phases are marked from the first import on (see --profile-startup)
+STARTUP = perf.StartupProfile()
+
 import tkinter as tk
 from tkinter import ttk, messagebox
+STARTUP.mark('import tkinter')
 import json
 import os
-from PIL import Image, ImageTk
-import random
+import queue
+import sys
+import threading
+from recommender_engine import RecommenderEngine, filter_mask
+from result_cache import ResultCache
+from catalog_compiler import load_engine
+from image_loader import ImageLoader, preload_pil
+from card_list import FoodCard, VirtualCardList
+from thumbnail_cache import ThumbnailCache, CACHE_DIR
+from catalog_watcher import CatalogWatcher
+from catalog_schema import format_rejections, format_warnings
+from asset_atlas import ImageAtlas
+from ingredient_index import parse_terms
+from rotation import SessionRotator
+STARTUP.mark('import app modules')
+
+CATALOG_PATH = 'food_data.json'
+WINDOW_SIZE = (1000, 700)
+
+# The mood buttons should respond within this long of the first import
+STARTUP_BUDGET_MS = 200
+CATALOG_POLL_MS = 20
+
+# Ranked mode shows only the best matches
+MAX_RANKED_RESULTS = 50
+MAX_SIMILAR_RESULTS = 10
+MAX_SEARCH_RESULTS = 50
+
+# Rotation shows a fresh handful per click instead of every match
+ROTATION_SIZE = 8
+HISTORY_FILE = '.recent_foods.json'
+
+# Wait for a pause in typing before running a search
+SEARCH_DEBOUNCE_MS = 150
 
 class FoodRecommenderApp:
-    def __init__(self, root):
+    def __init__(self, root, profile_startup=False, keep_history=True):
         self.root = root
         self.root.title("🍽️ Mood Food Recommender")
-        self.root.geometry("1000x700")
         self.root.configure(bg='#f8f9fa')
+        self.profile_startup = profile_startup
+        self.keep_history = keep_history
         
         # Center the window
         self.center_window()
         
-        # Load data and images
-        self.food_data = self.load_food_data()
-        self.food_images = {}
+        # An empty engine stands in until the catalog has loaded
+        self.engine = RecommenderEngine({})
+        self.catalog_ready = False
+        self.widgets_ready = False
+        self.pending_recommendations = False
+        self.result_cache = ResultCache()
+        self.card_bg = '#ffffff'
         
         # Current recommendations
         self.current_recommendations = []
-        
-        # Create GUI
+        self.current_mood = None
+        # The last rotated picks: (mood, catalog version, food ids, names)
+        self.rotation = None
+        # Name of the food whose "More like this" list is shown, if any
+        self.similar_to = None
+        self.search_after_id = None
+        
+        # Load the catalog and import PIL off the Tk thread
+        self.catalog_queue = queue.Queue()
+        self.loader_thread = threading.Thread(target=self.load_in_background, daemon=True, name="catalog-loader")
+        self.loader_thread.start()
+        
+        # Show the header and mood buttons first, the rest once they are on screen
         self.create_widgets()
-        
-        # Load images in background
-        self.root.after(100, self.load_images)
+        STARTUP.mark('header and mood buttons')
+        self.root.after_idle(self.finish_startup)
         
     def center_window(self):
-        """Center the window on screen"""
-        self.root.update_idletasks()
-        width = self.root.winfo_width()
-        height = self.root.winfo_height()
+        """Center the window on screen without waiting for it to be drawn"""
+        width, height = WINDOW_SIZE
         x = (self.root.winfo_screenwidth() // 2) - (width // 2)
         y = (self.root.winfo_screenheight() // 2) - (height // 2)
         self.root.geometry(f'{width}x{height}+{x}+{y}')
         
+    @perf.timed('load_food_data')
     def load_food_data(self):
-        """Load food data from JSON file"""
+        """Load food data into the recommendation engine via the compiled catalog
+
+        Runs on the loader thread, so errors are returned as a message for
+        the Tk thread to show rather than shown here.
+        """
         try:
-            with open('food_data.json', 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return load_engine(CATALOG_PATH), None
         except FileNotFoundError:
-            messagebox.showerror("Error", "food_data.json file not found!")
-            return {}
+            return RecommenderEngine({}), "food_data.json file not found!"
         except json.JSONDecodeError:
-            messagebox.showerror("Error", "Invalid JSON in food_data.json!")
-            return {}
+            return RecommenderEngine({}), "Invalid JSON in food_data.json!"
+        except (KeyError, ValueError, IndexError):
+            return RecommenderEngine({}), "Malformed food entry in food_data.json!"
     
-    def load_images(self):
-        """Load all food images"""
+    def load_in_background(self):
+        """Load the catalog, then warm up PIL for the first thumbnails and build the search indexes"""
         try:
-            for mood_category in self.food_data.values():
-                for food in mood_category:
-                    image_path = food.get('image', 'default_food.jpg')
-                    if os.path.exists(image_path):
-                        image = Image.open(image_path)
-                        image = image.resize((200, 150), Image.Resampling.LANCZOS)
-                        self.food_images[food['name']] = ImageTk.PhotoImage(image)
-            
-            # Load default image if not already loaded
-            if 'default_food.jpg' not in self.food_images and os.path.exists('default_food.jpg'):
-                image = Image.open('default_food.jpg')
-                image = image.resize((200, 150), Image.Resampling.LANCZOS)
-                self.food_images['default'] = ImageTk.PhotoImage(image)
-                
+            result = self.load_food_data()
         except Exception as e:
-            print(f"Error loading images: {e}")
+            result = RecommenderEngine({}), f"Failed to load food_data.json: {e}"
+        self.catalog_queue.put(result)
+        STARTUP.mark('catalog loaded (thread)')
+        preload_pil()
+        STARTUP.mark('PIL imported (thread)')
+        # A search or "More like this" before this finishes waits for it
+        result[0].build_lookups()
+        STARTUP.mark('search indexes built (thread)')
+    
+    def finish_startup(self):
+        """Build the remaining sections once the mood buttons respond"""
+        STARTUP.mark('interactive')
+        self.create_remaining_widgets()
+        STARTUP.mark('remaining widgets')
+        self.widgets_ready = True
+        if self.mood_var.get():
+            self.on_mood_selected()
+        self.status_label.config(text="Loading the food catalog...")
+        self.poll_catalog_load()
+    
+    def poll_catalog_load(self):
+        """Swap in the catalog once the loader thread hands it over"""
+        try:
+            engine, error = self.catalog_queue.get_nowait()
+        except queue.Empty:
+            pass
+        else:
+            self.on_catalog_loaded(engine, error)
+        if not self.catalog_ready or self.loader_thread.is_alive():
+            self.root.after(CATALOG_POLL_MS, self.poll_catalog_load)
+        elif self.profile_startup:
+            print(STARTUP.report(STARTUP_BUDGET_MS, 'interactive'), file=sys.stderr)
+    
+    def on_catalog_loaded(self, engine, error):
+        """Install the loaded engine and run anything asked for while loading"""
+        self.engine = engine
+        self.catalog_ready = True
+        self.image_loader = ImageLoader(
+            self.root,
+            cache=ThumbnailCache(os.path.join(engine.base_dir, CACHE_DIR)),
+            atlas=ImageAtlas.load(engine.base_dir)
+        )
+        self.default_image_path = os.path.join(engine.base_dir, 'default_food.jpg')
+        self.rotator = SessionRotator(
+            os.path.join(engine.base_dir, HISTORY_FILE) if self.keep_history else None
+        )
+        
+        # Pick up edits to food_data.json without a restart
+        self.start_catalog_watcher()
+        STARTUP.mark('catalog ready')
+        
+        if error is not None:
+            self.status_label.config(text="Catalog could not be loaded.")
+            messagebox.showerror("Error", error)
+            return
+        
+        self.status_label.config(text="Ready to recommend! Select your mood to begin." + self.rejected_note())
+        if self.search_var.get().strip():
+            self.run_search()
+        elif self.pending_recommendations:
+            self.pending_recommendations = False
+            self.generate_recommendations()
+        elif self.mood_var.get():
+            self.on_mood_selected()
+    
+    def rejected_note(self):
+        """Report entries skipped by validation on stderr, with a short note for the status bar"""
+        if self.engine.warnings:
+            print(format_warnings(self.engine.warnings), file=sys.stderr)
+        if not self.engine.rejected:
+            return ""
+        print(format_rejections(self.engine.rejected), file=sys.stderr)
+        return f" ({len(self.engine.rejected)} malformed entries skipped)"
+    
+    def start_catalog_watcher(self):
+        """Reload the catalog in the background whenever food_data.json changes"""
+        self.reload_queue = queue.Queue()
+        self.catalog_watcher = CatalogWatcher(
+            CATALOG_PATH,
+            self.engine,
+            on_reload=self.queue_catalog_reload,
+            on_error=lambda error: self.reload_queue.put((None, None, error))
+        ).start()
+        self.root.after(500, self.poll_catalog_reload)
+    
+    def queue_catalog_reload(self, engine, diff):
+        """Build the reloaded engine's search indexes on the watcher thread, then hand it over"""
+        engine.build_lookups()
+        self.reload_queue.put((engine, diff, None))
+    
+    def poll_catalog_reload(self):
+        """Apply reloads handed over by the watcher thread on the Tk thread"""
+        while True:
+            try:
+                engine, diff, error = self.reload_queue.get_nowait()
+            except queue.Empty:
+                break
+            if error is not None:
+                # Keep serving the previous catalog rather than blanking it
+                self.status_label.config(
+                    text=f"Catalog update ignored, keeping previous version: {error}"
+                )
+            else:
+                self.apply_catalog_reload(engine, diff)
+        self.root.after(500, self.poll_catalog_reload)
+    
+    def apply_catalog_reload(self, engine, diff):
+        """Swap in a reloaded catalog and refresh only what changed on screen"""
+        self.engine = engine
+        self.result_cache.invalidate()
+        # A rebuilt atlas comes with a catalog rewrite
+        self.image_loader.atlas = ImageAtlas.load(engine.base_dir)
+        
+        # Re-decode only images whose files changed; new paths load on demand
+        stale_paths = self.image_loader.drop_stale()
+        stale_names = set(diff.changed)
+        if stale_paths:
+            # Only cards that exist can show a stale image, so check those rather than the catalog
+            stale_names.update(key for key, card in self.card_list.cards() if card.image_path in stale_paths)
+        
+        # Refresh whichever view is shown: similar foods, search results or the mood list
+        similar_id = engine.find(self.similar_to) if self.similar_to else None
+        if similar_id is not None:
+            self.show_similar(similar_id, keep_scroll=True, stale_keys=stale_names)
+        elif self.search_var.get().strip():
+            self.run_search(keep_scroll=True, stale_keys=stale_names)
+        elif self.current_mood in engine.mood_bits:
+            self.generate_recommendations(live=True, stale_keys=stale_names)
+        elif self.current_mood or self.card_list.items:
+            self.current_mood = None
+            self.similar_to = None
+            self.current_recommendations = []
+            self.card_list.set_items([])
+        
+        self.status_label.config(
+            text=f"Catalog reloaded: {len(diff.added)} added, {len(diff.removed)} removed, "
+                 f"{len(diff.changed)} changed." + self.rejected_note()
+        )
+    
+    def food_image_path(self, food):
+        """Resolve a food's image file, falling back to the default image"""
+        image_path = os.path.join(self.engine.base_dir, food.get('image', 'default_food.jpg'))
+        return image_path if os.path.exists(image_path) else self.default_image_path
     
     def create_widgets(self):
-        """Create all GUI widgets"""
+        """Create the widgets shown first"""
         # Create main container with scrollbar
-        main_container = tk.Frame(self.root, bg='#f8f9fa')
-        main_container.pack(fill='both', expand=True, padx=10, pady=10)
+        self.main_container = tk.Frame(self.root, bg='#f8f9fa')
+        self.main_container.pack(fill='both', expand=True, padx=10, pady=10)
         
         # Header
-        self.create_header(main_container)
+        self.create_header(self.main_container)
         
         # Mood Selection
-        self.create_mood_selection(main_container)
-        
+        self.create_mood_selection(self.main_container)
+    
+    def create_remaining_widgets(self):
+        """Create the widgets below the mood selection"""
         # Preferences
-        self.create_preferences(main_container)
+        self.create_preferences(self.main_container)
         
         # Recommendations Area
-        self.create_recommendations_area(main_container)
+        self.create_recommendations_area(self.main_container)
         
         # Status Bar
-        self.create_status_bar(main_container)
+        self.create_status_bar(self.main_container)
+        
+        # Performance panel, only when instrumentation is on
+        if perf.enabled():
+            self.create_perf_panel(self.main_container)
     
     def create_header(self, parent):
         """Create application header"""
@@ -161,6 +351,27 @@ class FoodRecommenderApp:
                 cursor='hand2'
             )
             btn.pack()
+        
+        # Search across every mood by name, type or ingredient
+        search_frame = tk.Frame(mood_frame, bg='#ffffff')
+        search_frame.pack(fill='x', pady=(10, 0))
+        
+        tk.Label(
+            search_frame,
+            text="🔍 Or search foods:",
+            font=('Arial', 11, 'bold'),
+            bg='#ffffff',
+            fg='#2d3436'
+        ).pack(side='left')
+        
+        self.search_var = tk.StringVar()
+        self.search_var.trace_add('write', lambda *args: self.on_search_changed())
+        tk.Entry(
+            search_frame,
+            textvariable=self.search_var,
+            font=('Arial', 11),
+            width=40
+        ).pack(side='left', padx=10)
     
     def create_preferences(self, parent):
         """Create user preferences section"""
@@ -206,10 +417,58 @@ class FoodRecommenderApp:
                 font=('Arial', 10),
                 bg='#ffffff',
                 fg='#2d3436',
-                cursor='hand2'
+                cursor='hand2',
+                command=self.on_filters_changed
             )
             cb.grid(row=1, column=i, sticky='w', padx=10)
         
+        # Ranked mode turns the preferences into weights instead of filters
+        self.rank_var = tk.BooleanVar()
+        tk.Checkbutton(
+            pref_frame,
+            text="🏆 Rank best matches (use preferences as weights, not filters)",
+            variable=self.rank_var,
+            font=('Arial', 10),
+            bg='#ffffff',
+            fg='#2d3436',
+            cursor='hand2',
+            command=self.on_filters_changed
+        ).grid(row=2, column=0, columnspan=2, sticky='w', padx=10, pady=(5, 0))
+        
+        # Rotation picks a few foods not shown recently on every click
+        self.rotate_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            pref_frame,
+            text=f"🎲 Fresh picks each time ({ROTATION_SIZE} at a time)",
+            variable=self.rotate_var,
+            font=('Arial', 10),
+            bg='#ffffff',
+            fg='#2d3436',
+            cursor='hand2',
+            command=self.on_filters_changed
+        ).grid(row=2, column=2, columnspan=2, sticky='w', padx=10, pady=(5, 0))
+        
+        # Ingredient filters, comma separated, applied on Enter
+        self.exclude_var = tk.StringVar()
+        self.require_var = tk.StringVar()
+        ingredient_fields = [
+            ("🚫 Avoid ingredients:", self.exclude_var, 0),
+            ("✅ Must include:", self.require_var, 2)
+        ]
+        
+        for text, var, column in ingredient_fields:
+            tk.Label(
+                pref_frame,
+                text=text,
+                font=('Arial', 10),
+                bg='#ffffff',
+                fg='#2d3436'
+            ).grid(row=3, column=column, sticky='e', padx=10, pady=(8, 0))
+            entry = tk.Entry(pref_frame, textvariable=var, font=('Arial', 10), width=24)
+            entry.grid(row=3, column=column + 1, sticky='w', pady=(8, 0))
+            entry.bind('<Return>', lambda event: self.on_filters_changed())
+            entry.bind('<FocusOut>', lambda event: self.on_filters_changed())
+        
         # Get Recommendations Button
         self.recommend_btn = tk.Button(
             pref_frame,
@@ -223,7 +482,7 @@ class FoodRecommenderApp:
             padx=20,
             pady=8
         )
-        self.recommend_btn.grid(row=2, column=0, columnspan=4, pady=15)
+        self.recommend_btn.grid(row=4, column=0, columnspan=4, pady=15)
     
     def create_recommendations_area(self, parent):
         """Create recommendations display area"""
@@ -241,15 +500,17 @@ class FoodRecommenderApp:
         # Create canvas and scrollbar for recommendations
         self.canvas = tk.Canvas(rec_frame, bg='#ffffff', highlightthickness=0)
         scrollbar = ttk.Scrollbar(rec_frame, orient="vertical", command=self.canvas.yview)
-        self.scrollable_frame = tk.Frame(self.canvas, bg='#ffffff')
         
-        self.scrollable_frame.bind(
-            "<Configure>",
-            lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+        # Only the visible rows get card widgets; they are recycled while scrolling
+        self.card_list = VirtualCardList(
+            self.canvas,
+            self.create_food_card,
+            self.bind_food_card,
+            item_key=lambda food_id: self.engine.record(food_id).name
+        )
+        self.canvas.configure(
+            yscrollcommand=lambda first, last: (scrollbar.set(first, last), self.card_list.schedule_refresh())
         )
-        
-        self.canvas.create_window((0, 0), window=self.scrollable_frame, anchor="nw")
-        self.canvas.configure(yscrollcommand=scrollbar.set)
         
         self.canvas.pack(side="left", fill="both", expand=True)
         scrollbar.pack(side="right", fill="y")
@@ -269,71 +530,225 @@ class FoodRecommenderApp:
         )
         self.status_label.pack(side='left', padx=10)
     
+    def create_perf_panel(self, parent):
+        """Create a debug panel with live hot-path latencies"""
+        perf_frame = tk.Frame(parent, bg='#2d3436')
+        perf_frame.pack(fill='x', pady=(5, 0))
+        
+        self.perf_label = tk.Label(
+            perf_frame,
+            font=('Courier', 9),
+            bg='#2d3436',
+            fg='#dfe6e9',
+            justify='left',
+            anchor='w'
+        )
+        self.perf_label.pack(side='left', fill='x', expand=True, padx=10, pady=4)
+        
+        for text, command in (("Reset", perf.REGISTRY.reset), ("Export JSON", self.export_perf)):
+            tk.Button(
+                perf_frame,
+                text=text,
+                font=('Arial', 9),
+                command=command,
+                cursor='hand2'
+            ).pack(side='right', padx=5, pady=4)
+        
+        self.update_perf_panel()
+    
+    def update_perf_panel(self):
+        """Refresh the performance panel once a second"""
+        snapshot = perf.REGISTRY.snapshot()
+        lines = [
+            f"{name:<28} n={summary['count']:<6} p50={summary['p50'] * 1000:8.2f} ms  "
+            f"p95={summary['p95'] * 1000:8.2f} ms  max={summary['max'] * 1000:8.2f} ms"
+            for name, summary in sorted(snapshot['timings'].items())
+        ]
+        counters = '  '.join(f"{name}={value}" for name, value in sorted(snapshot['counters'].items()))
+        if counters:
+            lines.append(counters)
+        self.perf_label.config(text='\n'.join(lines) or "No samples yet.")
+        self.root.after(1000, self.update_perf_panel)
+    
+    def export_perf(self):
+        """Write the collected timings next to the catalog as JSON and Prometheus text"""
+        base = os.path.join(self.engine.base_dir, 'perf_metrics')
+        with open(base + '.json', 'w', encoding='utf-8') as f:
+            f.write(perf.REGISTRY.to_json())
+        with open(base + '.prom', 'w', encoding='utf-8') as f:
+            f.write(perf.REGISTRY.to_prometheus())
+        self.status_label.config(text=f"Performance data written to {base}.json and {base}.prom")
+    
     def on_mood_selected(self):
         """Enable recommend button when mood is selected"""
+        if not self.widgets_ready:
+            # finish_startup picks the selection up
+            return
         self.recommend_btn.config(state='normal', bg='#00b894')
         mood = self.mood_var.get()
         self.status_label.config(text=f"Selected: {mood.capitalize()} mood. Click to get recommendations!")
     
-    def generate_recommendations(self):
-        """Generate and display food recommendations"""
-        mood = self.mood_var.get()
+    def on_search_changed(self):
+        """Debounce keystrokes so only the last one in a burst runs a search"""
+        if self.search_after_id is not None:
+            self.root.after_cancel(self.search_after_id)
+        self.search_after_id = self.root.after(SEARCH_DEBOUNCE_MS, self.run_search)
+    
+    def run_search(self, keep_scroll=False, stale_keys=()):
+        """Show the foods best matching the search box, or go back to the mood view"""
+        self.search_after_id = None
+        if not self.catalog_ready:
+            # on_catalog_loaded runs the search
+            return
+        self.similar_to = None
+        query = self.search_var.get().strip()
+        if not query:
+            if self.current_mood:
+                self.generate_recommendations(live=True, stale_keys=stale_keys)
+            else:
+                self.current_recommendations = []
+                self.card_list.set_items([])
+            return
+        
+        results = self.engine.search(query, MAX_SEARCH_RESULTS)
+        self.current_recommendations = results
+        self.display_recommendations(results, None, keep_scroll=keep_scroll, stale_keys=stale_keys)
+        if results:
+            self.status_label.config(text=f"{len(results)} foods match \"{query}\".")
+        else:
+            self.status_label.config(text=f"No foods match \"{query}\".")
+    
+    def on_filters_changed(self):
+        """Re-filter the shown recommendations live when a preference is toggled"""
+        if self.current_mood:
+            self.generate_recommendations(live=True)
+    
+    def generate_recommendations(self, live=False, stale_keys=()):
+        """Generate and display food recommendations
+
+        A live update keeps the scroll position, reuses the cards of foods
+        that are still shown and reports empty results in the status bar
+        instead of a dialog. With rotation on, only a click draws fresh
+        picks; a live update re-filters the picks already shown.
+        """
+        mood = self.current_mood if live else self.mood_var.get()
         
         if not mood:
             messagebox.showwarning("Warning", "Please select a mood first!")
             return
         
-        # Clear previous recommendations
-        for widget in self.scrollable_frame.winfo_children():
-            widget.destroy()
-        
-        # Get recommendations based on mood
-        recommendations = self.food_data.get(mood, [])
+        if not self.catalog_ready:
+            self.pending_recommendations = True
+            self.status_label.config(text="Still loading the food catalog, recommendations will follow...")
+            return
         
-        if not recommendations:
+        # Check the mood exists in the catalog
+        if not self.engine.mood_bits.get(mood):
             messagebox.showerror("Error", f"No recommendations found for {mood} mood!")
             return
         
         # Apply filters
-        filtered_recs = self.apply_filters(recommendations)
+        self.similar_to = None
+        filtered_recs = self.apply_filters(mood)
+        pool_size = len(filtered_recs)
+        rotating = self.rotate_var.get() and not self.rank_var.get()
+        if rotating and not live:
+            filtered_recs = self.rotate(mood, filtered_recs)
+            engine = self.engine
+            self.rotation = (mood, engine.version, filtered_recs,
+                             [engine.record(food_id).name for food_id in filtered_recs])
+        elif rotating and self.rotation and self.rotation[0] == mood:
+            filtered_recs = self.shown_picks(filtered_recs)
+        else:
+            rotating = False
         self.current_recommendations = filtered_recs
+        self.current_mood = mood
+        
+        # Display recommendations
+        self.display_recommendations(filtered_recs, mood, keep_scroll=live, stale_keys=stale_keys)
         
         if not filtered_recs:
-            messagebox.showinfo("No Results", "No foods match your current filters. Try adjusting your preferences.")
+            if rotating and live:
+                self.status_label.config(text="None of your picks match the current filters. Click for fresh ones!")
+            elif live:
+                self.status_label.config(text="No foods match your current filters.")
+            else:
+                messagebox.showinfo("No Results", "No foods match your current filters. Try adjusting your preferences.")
             return
         
-        # Display recommendations
-        self.display_recommendations(filtered_recs, mood)
-        
         # Update status
-        self.status_label.config(text=f"Found {len(filtered_recs)} recommendations for {mood} mood!")
+        if rotating and live:
+            self.status_label.config(
+                text=f"Showing {len(filtered_recs)} of your picks still matching for {mood} mood. "
+                     f"Click for fresh ones!"
+            )
+        elif rotating and pool_size > len(filtered_recs):
+            self.status_label.config(
+                text=f"Showing {len(filtered_recs)} fresh picks of {pool_size} for {mood} mood. "
+                     f"Click again for more!"
+            )
+        else:
+            self.status_label.config(text=f"Found {len(filtered_recs)} recommendations for {mood} mood!")
     
-    def apply_filters(self, recommendations):
-        """Apply user preference filters"""
-        filtered = recommendations.copy()
-        
-        # Quick prep filter
-        if self.quick_var.get():
-            filtered = [food for food in filtered if int(food['prep_time'].split()[0]) <= 15]
-        
-        # Healthy filter (simple implementation)
-        if self.healthy_var.get():
-            # Consider foods with reasonable calorie count as healthy
-            filtered = [food for food in filtered if int(food['calories']) < 400]
-        
-        # Low calorie filter
-        if self.low_cal_var.get():
-            filtered = [food for food in filtered if int(food['calories']) < 300]
-        
-        # Vegetarian filter (simplified)
-        if self.veg_var.get():
-            non_veg_keywords = ['chicken', 'fish', 'meat', 'beef', 'pork']
-            filtered = [food for food in filtered if not any(keyword in food['ingredients'].lower() for keyword in non_veg_keywords)]
-        
-        return filtered
+    def filter_state(self):
+        """The preference bitmask and (exclude, require) ingredient terms"""
+        mask = filter_mask(
+            veg=self.veg_var.get(),
+            healthy=self.healthy_var.get(),
+            quick=self.quick_var.get(),
+            low_cal=self.low_cal_var.get()
+        )
+        terms = (parse_terms(self.exclude_var.get()), parse_terms(self.require_var.get()))
+        return mask, terms
+    
+    @perf.timed('apply_filters')
+    def apply_filters(self, mood):
+        """Return the ids of the mood's foods passing the user's preference filters
+
+        In ranked mode the preferences become soft weights and the best
+        MAX_RANKED_RESULTS matches are returned, best first.
+        """
+        mask, terms = self.filter_state()
+        if self.rank_var.get():
+            engine = self.engine
+            return self.result_cache.rendered(
+                engine, mood, 0, ('rank', mask),
+                lambda food_ids: tuple(engine.rank(mood, MAX_RANKED_RESULTS, soft_mask=mask,
+                                                   exclude=terms[0], require=terms[1])),
+                terms
+            )
+        return self.result_cache.food_ids(self.engine, mood, mask, terms)
+    
+    @perf.timed('rotate')
+    def rotate(self, mood, pool):
+        """Pick a handful of foods from the filtered pool that were not shown recently"""
+        mask, terms = self.filter_state()
+        engine = self.engine
+        return self.rotator.sample(
+            (mood, mask, terms, engine.version),
+            pool,
+            ROTATION_SIZE,
+            name=lambda food_id: engine.record(food_id).name
+        )
     
-    def display_recommendations(self, recommendations, mood):
-        """Display food recommendations in scrollable area"""
+    def shown_picks(self, pool):
+        """The last rotated picks still in the re-filtered pool, in the order they were shown"""
+        mood, version, picks, names = self.rotation
+        if version == self.engine.version:
+            in_pool = set(pool)
+            return [food_id for food_id in picks if food_id in in_pool]
+        # The catalog was reloaded and ids changed, so find the picks by name
+        order = {name: i for i, name in enumerate(names)}
+        found = {}
+        for food_id in pool:
+            i = order.get(self.engine.record(food_id).name)
+            if i is not None:
+                found.setdefault(i, food_id)
+        return [found[i] for i in sorted(found)]
+    
+    @perf.timed('display_recommendations')
+    def display_recommendations(self, recommendations, mood, keep_scroll=False, stale_keys=()):
+        """Display food recommendations in the virtualized card list"""
         mood_colors = {
             'happy': '#fff9c4',
             'sad': '#e3f2fd',
@@ -341,159 +756,46 @@ class FoodRecommenderApp:
             'tired': '#e8f5e8'
         }
         
-        card_bg = mood_colors.get(mood, '#ffffff')
-        
-        for i, food in enumerate(recommendations):
-            # Create card for each food
-            card_frame = tk.Frame(
-                self.scrollable_frame,
-                bg=card_bg,
-                relief='raised',
-                bd=1,
-                padx=15,
-                pady=15
-            )
-            card_frame.pack(fill='x', pady=8, padx=5)
-            
-            # Food content
-            self.create_food_card(card_frame, food, i+1, card_bg)
-    
-    def create_food_card(self, parent, food, index, bg_color):
-        """Create a food recommendation card"""
-        # Main content frame
-        content_frame = tk.Frame(parent, bg=bg_color)
-        content_frame.pack(fill='x')
-        
-        # Left side - Image
-        left_frame = tk.Frame(content_frame, bg=bg_color)
-        left_frame.pack(side='left', padx=(0, 15))
-        
-        # Display food image
-        food_image = self.food_images.get(food['name'], self.food_images.get('default', None))
-        if food_image:
-            img_label = tk.Label(left_frame, image=food_image, bg=bg_color)
-            img_label.pack()
-        else:
-            # Placeholder if no image
-            placeholder = tk.Label(left_frame, text="🍽️\nNo Image", bg=bg_color, font=('Arial', 8))
-            placeholder.pack()
-        
-        # Right side - Details
-        right_frame = tk.Frame(content_frame, bg=bg_color)
-        right_frame.pack(side='left', fill='x', expand=True)
-        
-        # Food name and basic info
-        name_frame = tk.Frame(right_frame, bg=bg_color)
-        name_frame.pack(fill='x', pady=(0, 10))
-        
-        tk.Label(
-            name_frame,
-            text=f"{index}. {food['name']}",
-            font=('Arial', 16, 'bold'),
-            bg=bg_color,
-            fg='#2d3436'
-        ).pack(side='left')
-        
-        # Food type and prep time
-        info_text = f"📋 {food['type']} | ⏰ {food['prep_time']} | 🔥 {food['calories']} cal"
-        tk.Label(
-            name_frame,
-            text=info_text,
-            font=('Arial', 10),
-            bg=bg_color,
-            fg='#636e72'
-        ).pack(side='left', padx=(15, 0))
-        
-        # Nutrition info
-        nutrition = food.get('nutrition', {})
-        if nutrition:
-            nutrition_text = f"🍽️ Nutrition: Carbs {nutrition.get('carbs', 'N/A')} | Protein {nutrition.get('protein', 'N/A')} | Fat {nutrition.get('fat', 'N/A')}"
-            tk.Label(
-                right_frame,
-                text=nutrition_text,
-                font=('Arial', 9, 'bold'),
-                bg=bg_color,
-                fg='#0984e3'
-            ).pack(anchor='w', pady=(0, 5))
-        
-        # Reason
-        reason_frame = tk.Frame(right_frame, bg=bg_color)
-        reason_frame.pack(fill='x', pady=5)
-        
-        tk.Label(
-            reason_frame,
-            text="💡 Why it's perfect for you:",
-            font=('Arial', 10, 'bold'),
-            bg=bg_color,
-            fg='#2d3436'
-        ).pack(anchor='w')
-        
-        tk.Label(
-            reason_frame,
-            text=food['reason'],
-            font=('Arial', 9),
-            bg=bg_color,
-            fg='#2d3436',
-            wraplength=600,
-            justify='left'
-        ).pack(anchor='w')
-        
-        # Ingredients and tips in two columns
-        details_frame = tk.Frame(right_frame, bg=bg_color)
-        details_frame.pack(fill='x', pady=5)
-        
-        # Ingredients column
-        ingredients_frame = tk.Frame(details_frame, bg=bg_color)
-        ingredients_frame.pack(side='left', fill='x', expand=True, padx=(0, 10))
-        
-        tk.Label(
-            ingredients_frame,
-            text="📝 Ingredients:",
-            font=('Arial', 10, 'bold'),
-            bg=bg_color,
-            fg='#2d3436'
-        ).pack(anchor='w')
-        
-        tk.Label(
-            ingredients_frame,
-            text=food['ingredients'],
-            font=('Arial', 9),
-            bg=bg_color,
-            fg='#2d3436',
-            wraplength=300,
-            justify='left'
-        ).pack(anchor='w')
-        
-        # Tips column
-        tips_frame = tk.Frame(details_frame, bg=bg_color)
-        tips_frame.pack(side='left', fill='x', expand=True, padx=(10, 0))
-        
-        tk.Label(
-            tips_frame,
-            text="👨‍🍳 Chef's Tip:",
-            font=('Arial', 10, 'bold'),
-            bg=bg_color,
-            fg='#2d3436'
-        ).pack(anchor='w')
-        
-        tk.Label(
-            tips_frame,
-            text=food['tips'],
-            font=('Arial', 9),
-            bg=bg_color,
-            fg='#2d3436',
-            wraplength=300,
-            justify='left'
-        ).pack(anchor='w')
+        self.card_bg = mood_colors.get(mood, '#ffffff')
+        self.card_list.set_items(recommendations, keep_scroll=keep_scroll, stale_keys=stale_keys)
+    
+    @perf.timed('create_food_card')
+    def create_food_card(self, parent):
+        """Create a reusable food recommendation card"""
+        return FoodCard(parent, self.image_loader, on_more_like_this=self.show_similar)
+    
+    def bind_food_card(self, card, food_id, row, reused):
+        """Show a food on a card, only renumbering it if it already shows that food"""
+        card.food_id = food_id
+        if reused:
+            card.set_index(self.engine.record(food_id).name, row + 1)
+            card.set_bg(self.card_bg)
+            return
+        food = self.engine.details(food_id)
+        card.show(food, row + 1, self.card_bg, self.food_image_path(food))
+    
+    def show_similar(self, food_id, keep_scroll=False, stale_keys=()):
+        """Replace the list with the foods most like the given one, across all moods"""
+        if food_id is None:
+            return
+        name = self.similar_to = self.engine.record(food_id).name
+        similar = [food_id] + self.engine.similar(food_id, MAX_SIMILAR_RESULTS)
+        self.current_recommendations = similar
+        self.display_recommendations(similar, None, keep_scroll=keep_scroll, stale_keys=stale_keys)
+        self.status_label.config(
+            text=f"Showing {len(similar) - 1} foods similar to {name}. Pick a mood to go back."
+        )
 
-def main():
+def main(profile_startup=False, keep_history=True):
     """Main function to run the application"""
     try:
         root = tk.Tk()
-        app = FoodRecommenderApp(root)
+        STARTUP.mark('tk root')
+        app = FoodRecommenderApp(root, profile_startup, keep_history)
         root.mainloop()
     except Exception as e:
         messagebox.showerror("Application Error", f"Failed to start application: {str(e)}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(profile_startup='--profile-startup' in sys.argv[1:],
+         keep_history='--no-history' not in sys.argv[1:])
\ No newline at end of file
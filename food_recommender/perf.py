@@ -0,0 +1,227 @@
+"""Lightweight counters and latency histograms for the hot paths
+
+Instrumentation is off by default. While disabled, a @timed function costs
+one global flag check on top of the call and nothing is recorded. Turn it
+on with enable() or by setting FOOD_PERF=1 in the environment.
+
+Latencies go into fixed-bucket histograms (the same layout Prometheus
+uses), so recording is a bisect and two additions and memory never grows.
+snapshot() returns everything as plain data; to_json() and
+to_prometheus() render it for the debug panel, files and the server's
+/metrics route.
+"""
+import bisect
+import functools
+import json
+import os
+import threading
+import time
+
+# Bucket upper bounds in seconds, from 10 microseconds to 10 seconds
+BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025,
+           0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRIC_PREFIX = 'food_recommender'
+
+_enabled = os.environ.get('FOOD_PERF', '').lower() in ('1', 'true', 'yes', 'on')
+
+
+def enable(on=True):
+    global _enabled
+    _enabled = on
+
+
+def enabled():
+    return _enabled
+
+
+class Histogram:
+    """Latency distribution over fixed buckets"""
+
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q):
+        """Estimate a quantile by interpolating inside its bucket"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                low = BUCKETS[i - 1] if i else 0.0
+                high = BUCKETS[i] if i < len(BUCKETS) else self.max
+                return min(low + (high - low) * (rank - seen) / bucket_count, self.max)
+            seen += bucket_count
+        return self.max
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'sum': self.total,
+            'mean': self.total / self.count if self.count else 0.0,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99),
+            'max': self.max,
+            'buckets': dict(zip([str(bound) for bound in BUCKETS] + ['+Inf'], self.counts)),
+        }
+
+
+class Registry:
+    """Named counters and histograms, safe to update from any thread"""
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def observe(self, name, seconds):
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(seconds)
+
+    def reset(self):
+        with self._lock:
+            self.counters = {}
+            self.histograms = {}
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'enabled': _enabled,
+                'counters': dict(self.counters),
+                'timings': {name: histogram.summary() for name, histogram in self.histograms.items()},
+            }
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self):
+        """Render the Prometheus text exposition format"""
+        snapshot = self.snapshot()
+        lines = []
+        for name, value in sorted(snapshot['counters'].items()):
+            metric = f"{METRIC_PREFIX}_{_metric_name(name)}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+        if snapshot['timings']:
+            metric = f"{METRIC_PREFIX}_duration_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+        for name, summary in sorted(snapshot['timings'].items()):
+            label = f'operation="{name}"'
+            cumulative = 0
+            for bound, bucket_count in summary['buckets'].items():
+                cumulative += bucket_count
+                lines.append(f'{metric}_bucket{{{label},le="{bound}"}} {cumulative}')
+            lines.append(f"{metric}_sum{{{label}}} {summary['sum']}")
+            lines.append(f"{metric}_count{{{label}}} {summary['count']}")
+        return '\n'.join(lines) + '\n'
+
+
+def _metric_name(name):
+    return ''.join(c if c.isalnum() else '_' for c in name)
+
+
+REGISTRY = Registry()
+
+
+def count(name, amount=1):
+    if _enabled:
+        REGISTRY.count(name, amount)
+
+
+def observe(name, seconds):
+    if _enabled:
+        REGISTRY.observe(name, seconds)
+
+
+class timer:
+    """Context manager timing a block into a histogram"""
+
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        if _enabled:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self.start is not None:
+            REGISTRY.observe(self.name, time.perf_counter() - self.start)
+
+
+def timed(name=None):
+    """Decorator recording every call's latency under name (default: the function name)"""
+    def decorate(fn):
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                REGISTRY.observe(label, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+class StartupProfile:
+    """Wall-clock marks for the phases of a startup, relative to when it began
+
+    Unlike the histograms this is always recorded: a handful of
+    perf_counter calls cost nothing next to a startup. Marks may come from
+    background threads.
+    """
+
+    def __init__(self, start=None):
+        self.start = time.perf_counter() if start is None else start
+        self.marks = []
+
+    def mark(self, phase):
+        self.marks.append((phase, time.perf_counter()))
+
+    def elapsed(self, phase):
+        """Milliseconds from the start to a phase's mark, or None if not reached"""
+        for name, at in self.marks:
+            if name == phase:
+                return (at - self.start) * 1000
+        return None
+
+    def report(self, budget_ms=None, interactive=None):
+        """Phase breakdown as text, with time-to-interactive against a budget"""
+        lines = [f"{'phase':<32} {'at ms':>9} {'took ms':>9}"]
+        previous = self.start
+        for phase, at in sorted(self.marks, key=lambda mark: mark[1]):
+            lines.append(f"{phase:<32} {(at - self.start) * 1000:9.1f} {(at - previous) * 1000:9.1f}")
+            previous = at
+        tti = self.elapsed(interactive) if interactive else None
+        if tti is not None and budget_ms is not None:
+            verdict = 'within' if tti <= budget_ms else 'OVER'
+            lines.append(f"time to interactive {tti:.1f} ms, {verdict} the {budget_ms} ms budget")
+        return '\n'.join(lines)
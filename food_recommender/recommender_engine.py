@@ -0,0 +1,331 @@
+import itertools
+import json
+import os
+import sys
+import threading
+
+from catalog_loader import CatalogSource, iter_catalog
+from catalog_schema import Rejection, SchemaError, normalize_food
+from ingredient_index import IngredientIndex, is_vegetarian, tokenize
+
+# Catalog shipped next to the code, used by the headless entry points
+DEFAULT_CATALOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'food_data.json')
+
+# Filter thresholds shared by every front end
+QUICK_PREP_MINUTES = 15
+HEALTHY_CALORIES = 400
+LOW_CALORIES = 300
+
+# Order of the preference flags inside a filter bitmask
+FILTER_NAMES = ('veg', 'healthy', 'quick', 'low_cal')
+
+# Text values that switch a flag on in query strings and input files
+TRUE_VALUES = ('1', 'true', 'yes', 'on')
+
+# Every engine built gets a fresh version, so caches can tell catalogs apart
+_catalog_versions = itertools.count(1)
+
+
+def filter_mask(veg=False, healthy=False, quick=False, low_cal=False):
+    """Pack the preference flags into a small integer bitmask"""
+    flags = (veg, healthy, quick, low_cal)
+    return sum(1 << i for i, flag in enumerate(flags) if flag)
+
+
+# Set-bit positions for every byte value, used to walk large bitsets quickly
+_BYTE_BITS = [tuple(i for i in range(8) if value >> i & 1) for value in range(256)]
+
+
+def bits_from_ids(ids, size):
+    """Build a bitset from food ids in one pass instead of OR-ing bit by bit"""
+    buf = bytearray((size + 7) // 8)
+    for food_id in ids:
+        buf[food_id >> 3] |= 1 << (food_id & 7)
+    return int.from_bytes(buf, 'little')
+
+
+def iter_bits(bits):
+    """Yield the positions of the set bits in ascending order"""
+    data = bits.to_bytes((bits.bit_length() + 7) // 8, 'little')
+    for byte_index, byte in enumerate(data):
+        if byte:
+            base = byte_index << 3
+            for bit in _BYTE_BITS[byte]:
+                yield base + bit
+
+
+class FoodRecord:
+    """Typed, pre-parsed view of a single catalog entry"""
+
+    __slots__ = ('food_id', 'mood', 'name', 'type', 'prep_minutes', 'calories',
+                 'carbs', 'protein', 'fat', 'vegetarian', 'image', 'data', 'span')
+
+    def __init__(self, food_id, mood, food, span=None, terms=None, fields=None):
+        """Raises SchemaError when the entry cannot be normalized"""
+        if fields is None:
+            fields = normalize_food(mood, food)
+        self.food_id = food_id
+        self.mood = mood
+        self.name = fields.name
+        # Types and image paths repeat across entries, so share one copy of each
+        self.type = sys.intern(fields.type)
+        self.prep_minutes = fields.prep_minutes
+        self.calories = fields.calories
+        self.carbs = fields.carbs
+        self.protein = fields.protein
+        self.fat = fields.fat
+        if terms is None:
+            terms = tokenize(fields.ingredients)
+        self.vegetarian = is_vegetarian(terms)
+        self.image = sys.intern(fields.image)
+        # Entries loaded from a file keep only their byte span; free text is re-read on demand
+        self.data = food if span is None else None
+        self.span = span
+
+    @classmethod
+    def from_fields(cls, food_id, mood, name, food_type, prep_minutes, calories,
+                    carbs, protein, fat, vegetarian, image, span):
+        """Create a record from already-parsed fields, e.g. a compiled catalog"""
+        record = cls.__new__(cls)
+        record.food_id = food_id
+        record.mood = mood
+        record.name = name
+        record.type = food_type
+        record.prep_minutes = prep_minutes
+        record.calories = calories
+        record.carbs = carbs
+        record.protein = protein
+        record.fat = fat
+        record.vegetarian = vegetarian
+        record.image = image
+        record.data = None
+        record.span = span
+        return record
+
+
+class RecommenderEngine:
+    """Headless recommendation engine answering filter queries with bitsets"""
+
+    def __init__(self, catalog=None, base_dir='.', source=None):
+        self.base_dir = base_dir
+        self.source = source
+        self.version = next(_catalog_versions)
+        self._scorer = None
+        self._similarity = None
+        self._search = None
+        self._names = None
+        # Held while a lookup index is built, so a build started on a
+        # background thread is waited for rather than repeated
+        self._index_lock = threading.Lock()
+        self.records = []
+        # Entries skipped at ingest because they failed validation
+        self.rejected = []
+        # Entries kept, but with nutrition values that could not be read
+        self.warnings = []
+        self.mood_bits = {}
+        self.filter_bits = {}
+        self._mood_ids = {}
+        self._filter_ids = {name: [] for name in FILTER_NAMES}
+        self.ingredients = IngredientIndex()
+
+        for mood, foods in (catalog or {}).items():
+            for food in foods:
+                self.add_food(mood, food)
+        self.build_index()
+
+    @classmethod
+    def from_file(cls, path='food_data.json', lazy=True):
+        """Build an engine from a catalog file
+
+        The file is streamed entry by entry, so the full document is never
+        held in memory. With lazy=True only the fields needed for filtering
+        are kept and the rest of each entry is fetched when it is displayed,
+        which fails with SourceChangedError once the file has been edited.
+        """
+        engine = cls(base_dir=os.path.dirname(path) or '.',
+                     source=CatalogSource(path) if lazy else None)
+        for mood, food, offset, length in iter_catalog(path):
+            engine.add_food(mood, food, (offset, length) if lazy else None)
+        engine.build_index()
+        return engine
+
+    def add_food(self, mood, food, span=None):
+        """Parse one catalog entry and queue it for indexing
+
+        Returns None, and records a Rejection, for an entry that fails
+        validation.
+        """
+        try:
+            fields = normalize_food(mood, food)
+        except SchemaError as e:
+            position = len(self.records) + len(self.rejected)
+            name = food.get('name') if isinstance(food, dict) else None
+            self.rejected.append(Rejection(position, mood, name, e.errors))
+            return None
+        if fields.warnings:
+            self.warnings.append(Rejection(len(self.records) + len(self.rejected), mood,
+                                           fields.name, fields.warnings))
+        terms = tokenize(fields.ingredients)
+        record = FoodRecord(len(self.records), mood, food, span, terms, fields)
+        self.records.append(record)
+        self.ingredients.add(record.food_id, terms)
+        self._mood_ids.setdefault(mood, []).append(record.food_id)
+
+        if record.vegetarian:
+            self._filter_ids['veg'].append(record.food_id)
+        if record.calories < HEALTHY_CALORIES:
+            self._filter_ids['healthy'].append(record.food_id)
+        if record.prep_minutes <= QUICK_PREP_MINUTES:
+            self._filter_ids['quick'].append(record.food_id)
+        if record.calories < LOW_CALORIES:
+            self._filter_ids['low_cal'].append(record.food_id)
+        return record
+
+    def build_index(self):
+        """Turn the queued id lists into the mood and filter bitsets"""
+        size = len(self.records)
+        for mood, ids in self._mood_ids.items():
+            self.mood_bits[mood] = bits_from_ids(ids, size)
+        for name, ids in self._filter_ids.items():
+            self.filter_bits[name] = bits_from_ids(ids, size)
+
+    @property
+    def moods(self):
+        return list(self.mood_bits)
+
+    def __len__(self):
+        return len(self.records)
+
+    def query_bits(self, mood, mask=0, exclude=(), require=()):
+        """Return the bitset of foods for a mood that pass every filter in mask
+
+        exclude drops foods containing any of the ingredient terms (e.g.
+        allergens) and require keeps only foods containing all of them.
+        """
+        bits = self.mood_bits.get(mood, 0)
+        for i, name in enumerate(FILTER_NAMES):
+            if mask & (1 << i):
+                bits &= self.filter_bits[name]
+        if exclude or require:
+            bits = self.ingredient_bits(bits, exclude, require)
+        return bits
+
+    def ingredient_bits(self, bits, exclude=(), require=()):
+        """Narrow a bitset by ingredient terms using the posting lists"""
+        size = len(self.records)
+        # Rarest terms first, so the candidate set shrinks as early as possible
+        for term in sorted(require, key=self.ingredients.count):
+            if not bits:
+                break
+            bits &= bits_from_ids(self.ingredients.lookup(term), size)
+        for term in exclude:
+            ids = self.ingredients.lookup(term)
+            if ids:
+                bits &= ~bits_from_ids(ids, size)
+        return bits
+
+    def recommend(self, mood, veg=False, healthy=False, quick=False, low_cal=False,
+                  exclude=(), require=()):
+        """Return the ids of matching foods in catalog order"""
+        mask = filter_mask(veg, healthy, quick, low_cal)
+        return list(iter_bits(self.query_bits(mood, mask, exclude, require)))
+
+    @property
+    def scorer(self):
+        """NumPy scoring columns for ranked queries, built on first use"""
+        if self._scorer is None:
+            from scoring import ScoringEngine
+            self._scorer = ScoringEngine(self)
+        return self._scorer
+
+    def rank(self, mood, k=10, hard_mask=0, soft_mask=0, exclude=(), require=()):
+        """Return the ids of the k best matches for a mood, best first"""
+        allowed = None
+        if exclude or require:
+            allowed = self.ingredient_bits((1 << len(self.records)) - 1, exclude, require)
+        return self.scorer.top_k(mood, k, hard_mask=hard_mask, soft_mask=soft_mask, allowed=allowed)
+
+    @property
+    def similarity(self):
+        """Ingredient, type and nutrition vectors for "more like this", built on first use"""
+        if self._similarity is None:
+            from similarity import SimilarityIndex
+            with self._index_lock:
+                if self._similarity is None:
+                    self._similarity = SimilarityIndex(self)
+        return self._similarity
+
+    def similar(self, food_id, k=10):
+        """Return the ids of the k foods most like food_id across all moods"""
+        return self.similarity.similar(food_id, k)
+
+    @property
+    def search_index(self):
+        """Trigram index over names, types and ingredients, built on first use"""
+        if self._search is None:
+            from search_index import SearchIndex
+            with self._index_lock:
+                if self._search is None:
+                    self._search = SearchIndex(self)
+        return self._search
+
+    @property
+    def name_index(self):
+        """Map of every food name to its ids, built on first use"""
+        if self._names is None:
+            with self._index_lock:
+                if self._names is None:
+                    names = {}
+                    for food_id, name in enumerate(self.food_names()):
+                        names.setdefault(name, []).append(food_id)
+                    self._names = names
+        return self._names
+
+    def build_lookups(self):
+        """Build the name, search and similarity indexes now, e.g. on a background thread"""
+        self.name_index
+        self.search_index
+        self.similarity
+
+    def food_names(self):
+        """Every food's name in id order, read straight from the columns when compiled"""
+        if hasattr(self.records, 'names'):
+            return self.records.names()
+        return [record.name for record in self.records]
+
+    def fingerprint(self, food_id):
+        """(mood, entry as compact JSON bytes) for spotting edits without decoding
+
+        None when only the source file holds the entry, so it cannot be
+        compared without re-reading a file that may have changed.
+        """
+        if hasattr(self.records, 'raw_details'):
+            return self.records.mood(food_id), self.records.raw_details(food_id)
+        record = self.records[food_id]
+        if record.data is None:
+            return None
+        # Same encoding as the compiled details table, so both kinds of engine compare equal
+        return record.mood, json.dumps(record.data, separators=(',', ':')).encode('utf-8')
+
+    def search(self, query, limit=50):
+        """Return the ids of the foods best matching a free-text query, across all moods"""
+        return self.search_index.search(query, limit)
+
+    def record(self, food_id):
+        return self.records[food_id]
+
+    def find(self, name):
+        """Id of the first food with the given name, or None"""
+        ids = self.name_index.get(name)
+        return ids[0] if ids else None
+
+    def details(self, food_id):
+        """Return the full catalog entry for a food"""
+        record = self.records[food_id]
+        if record.data is not None:
+            return record.data
+        return self.source.fetch(*record.span)
+
+    def image_path(self, food_id):
+        """Resolve a food's image path against the catalog directory"""
+        return os.path.join(self.base_dir, self.records[food_id].image)
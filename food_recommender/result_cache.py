@@ -0,0 +1,133 @@
+import threading
+from collections import OrderedDict
+
+import perf
+from recommender_engine import iter_bits
+
+NO_TERMS = ((), ())
+
+# Ad-hoc results (ingredient terms, parameterized forms) kept per cache
+MAX_RECENT = 256
+
+
+class CachedResult:
+    """Filtered food ids for one query plus any forms rendered from them"""
+
+    __slots__ = ('food_ids', 'forms')
+
+    def __init__(self, food_ids):
+        self.food_ids = food_ids
+        self.forms = {}
+
+
+class ResultCache:
+    """Memoizes filter results per (mood, filter mask, catalog version)
+
+    There are only a handful of moods and 16 filter combinations, so every
+    query repeats quickly and those results are kept for the whole catalog
+    version. Ingredient exclusions and requirements, passed as an
+    (exclude, require) pair of normalized term tuples, and parameterized
+    forms such as ('rank', k, soft_mask) come from user input and have no
+    such bound, so they live in an LRU of the max_recent latest ones.
+    Entries from an older catalog version are dropped as soon as a newer
+    version is queried, or explicitly via invalidate().
+    """
+
+    def __init__(self, max_recent=MAX_RECENT):
+        self.hits = 0
+        self.misses = 0
+        self.max_recent = max_recent
+        self._entries = {}
+        self._recent = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+
+    def _lookup(self, key, pinned):
+        """Cached value for key, counting the hit or miss (call with the lock held)"""
+        if key[2] != self._version:
+            self._drop_stale(key[2])
+        if pinned:
+            value = self._entries.get(key)
+        else:
+            value = self._recent.get(key)
+            if value is not None:
+                self._recent.move_to_end(key)
+        if value is not None:
+            self.hits += 1
+            perf.count('result_cache.hit')
+        else:
+            self.misses += 1
+            perf.count('result_cache.miss')
+        return value
+
+    def _store(self, key, value, pinned):
+        """Keep value unless another thread stored one first (call with the lock held)"""
+        if pinned:
+            return self._entries.setdefault(key, value)
+        value = self._recent.setdefault(key, value)
+        self._recent.move_to_end(key)
+        while len(self._recent) > self.max_recent:
+            self._recent.popitem(last=False)
+        return value
+
+    def get(self, engine, mood, mask, terms=NO_TERMS):
+        """Return the CachedResult for a query, computing it on a miss"""
+        key = (mood, mask, engine.version, terms)
+        pinned = terms == NO_TERMS
+        with self._lock:
+            entry = self._lookup(key, pinned)
+        if entry is not None:
+            return entry
+
+        entry = CachedResult(tuple(iter_bits(engine.query_bits(mood, mask, *terms))))
+        with self._lock:
+            return self._store(key, entry, pinned)
+
+    def food_ids(self, engine, mood, mask, terms=NO_TERMS):
+        return self.get(engine, mood, mask, terms).food_ids
+
+    def rendered(self, engine, mood, mask, form, render, terms=NO_TERMS):
+        """Return a memoized rendering (e.g. a JSON body) of a query's result
+
+        render(food_ids) is only called the first time a form is requested
+        for a given query and catalog version. A form named by a plain
+        string is kept with a pinned result; a tuple form carries request
+        parameters and is kept in the LRU.
+        """
+        if isinstance(form, tuple):
+            key = (mood, mask, engine.version, terms, form)
+            with self._lock:
+                value = self._lookup(key, False)
+            if value is None:
+                value = render(self.food_ids(engine, mood, mask, terms))
+                with self._lock:
+                    value = self._store(key, value, False)
+            return value
+        entry = self.get(engine, mood, mask, terms)
+        value = entry.forms.get(form)
+        if value is None:
+            value = entry.forms.setdefault(form, render(entry.food_ids))
+        return value
+
+    def _drop_stale(self, version):
+        self._entries = {key: entry for key, entry in self._entries.items() if key[2] == version}
+        self._recent = OrderedDict(
+            (key, value) for key, value in self._recent.items() if key[2] == version)
+        self._version = version
+
+    def invalidate(self):
+        """Forget every cached result, e.g. after the catalog was reloaded"""
+        with self._lock:
+            self._entries = {}
+            self._recent = OrderedDict()
+            self._version = None
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(self._entries),
+            'recent': len(self._recent),
+            'hit_rate': self.hits / total if total else 0.0,
+        }
@@ -0,0 +1,193 @@
+"""Per-session rotation of recommendations, so repeated clicks show fresh foods
+
+Each filtered pool (the cached tuple of food ids for one query) gets a
+ShuffledCursor: a lazy Fisher-Yates shuffle that draws the next food in
+O(1) and never copies or reshuffles the pool. Once a pool is exhausted a
+new pass starts in a fresh order.
+
+Recently shown foods sit in a fixed-size ring buffer and are skipped
+while fresh ones remain, so one pick costs O(k + history size) whatever
+the size of the pool. Foods are remembered by name, which stays stable
+across catalog reloads and restarts.
+
+With a history path the ring buffer is persisted as a small JSON file.
+It is read on the first pick rather than at startup.
+"""
+import json
+import os
+import random
+from collections import OrderedDict
+
+HISTORY_SIZE = 64
+HISTORY_VERSION = 1
+
+# Pools with a live cursor; older ones start over when queried again
+MAX_CURSORS = 64
+
+
+class RecentHistory:
+    """Ring buffer of the most recently shown keys with O(1) membership tests"""
+
+    def __init__(self, size=HISTORY_SIZE, items=()):
+        self.size = size
+        self._ring = [None] * size
+        self._head = 0
+        self._counts = {}
+        self._last_seen = {}
+        self._added = 0
+        for item in items:
+            self.add(item)
+
+    def add(self, key):
+        old = self._ring[self._head]
+        if old is not None:
+            if self._counts[old] == 1:
+                del self._counts[old]
+                del self._last_seen[old]
+            else:
+                self._counts[old] -= 1
+        self._ring[self._head] = key
+        self._head = (self._head + 1) % self.size
+        self._counts[key] = self._counts.get(key, 0) + 1
+        self._last_seen[key] = self._added
+        self._added += 1
+
+    def last_seen(self, key):
+        """Ordinal of the key's latest addition, -1 if it is not in the buffer"""
+        return self._last_seen.get(key, -1)
+
+    def __contains__(self, key):
+        return key in self._counts
+
+    def __len__(self):
+        return min(self._added, self.size)
+
+    def items(self):
+        """Keys from oldest to newest"""
+        ring = self._ring[self._head:] + self._ring[:self._head]
+        return [key for key in ring if key is not None]
+
+
+class ShuffledCursor:
+    """Draws a pool's items in random order, one O(1) step at a time
+
+    Only the positions swapped so far are stored, so nothing is copied or
+    shuffled up front.
+    """
+
+    __slots__ = ('pool', 'rng', '_swaps', '_next')
+
+    def __init__(self, pool, rng):
+        self.pool = pool
+        self.rng = rng
+        self._swaps = {}
+        self._next = 0
+
+    def draw(self):
+        size = len(self.pool)
+        if self._next == size:
+            # Every item was drawn once; start a new pass in a fresh order
+            self._swaps = {}
+            self._next = 0
+        i = self._next
+        j = self.rng.randrange(i, size)
+        swaps = self._swaps
+        at_i = swaps.pop(i, i)
+        if j == i:
+            picked = at_i
+        else:
+            picked = swaps.get(j, j)
+            swaps[j] = at_i
+        self._next = i + 1
+        return self.pool[picked]
+
+
+class SessionRotator:
+    """Samples fresh suggestions from filtered pools, avoiding recently shown foods"""
+
+    def __init__(self, history_path=None, size=HISTORY_SIZE, rng=None):
+        self.history_path = history_path
+        self.size = size
+        self.rng = rng or random.Random()
+        self._history = None
+        self._cursors = OrderedDict()
+
+    @property
+    def history(self):
+        """The recent-foods ring buffer, read from disk on first use"""
+        if self._history is None:
+            self._history = RecentHistory(self.size, self._load())
+        return self._history
+
+    def _load(self):
+        if not self.history_path:
+            return []
+        try:
+            with open(self.history_path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return []
+        if not isinstance(data, dict) or data.get('version') != HISTORY_VERSION:
+            return []
+        return [name for name in data.get('recent', []) if isinstance(name, str)]
+
+    def save(self):
+        """Write the history atomically; failures only cost variety next session"""
+        if not self.history_path or self._history is None:
+            return
+        tmp_path = f'{self.history_path}.{os.getpid()}.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': HISTORY_VERSION, 'recent': self._history.items()}, f)
+            os.replace(tmp_path, self.history_path)
+        except OSError as e:
+            print(f"Could not save recommendation history: {e}")
+
+    def _cursor(self, key, pool):
+        cursor = self._cursors.get(key)
+        if cursor is None or cursor.pool is not pool:
+            cursor = self._cursors[key] = ShuffledCursor(pool, self.rng)
+            while len(self._cursors) > MAX_CURSORS:
+                self._cursors.popitem(last=False)
+        self._cursors.move_to_end(key)
+        return cursor
+
+    def sample(self, key, pool, k, name=str):
+        """Pick up to k distinct foods from pool, preferring ones not shown recently
+
+        key identifies the pool (e.g. mood, filters and catalog version) so
+        its cursor carries on where the last pick stopped. name(food) gives
+        the stable key remembered in the history.
+        """
+        history = self.history
+        if len(pool) <= k:
+            picks = self.rng.sample(pool, len(pool))
+        else:
+            cursor = self._cursor(key, pool)
+            picks = []
+            chosen = set()
+            deferred = []
+            # At most k + len(history) fresh-or-recent draws, plus slack for a new pass
+            for _ in range(2 * k + len(history)):
+                food = cursor.draw()
+                if food in chosen:
+                    continue
+                chosen.add(food)
+                if name(food) in history:
+                    deferred.append(food)
+                    continue
+                picks.append(food)
+                if len(picks) == k:
+                    break
+            # Not enough fresh foods: fall back to the least recently shown, then any
+            deferred.sort(key=lambda food: history.last_seen(name(food)))
+            picks.extend(deferred[:k - len(picks)])
+            while len(picks) < k:
+                food = cursor.draw()
+                if food not in chosen:
+                    chosen.add(food)
+                    picks.append(food)
+        for food in picks:
+            history.add(name(food))
+        self.save()
+        return picks
@@ -0,0 +1,146 @@
+"""Ranked recommendations: weighted scores over NumPy columns with top-k selection
+
+Calories, prep time and macros are normalized to [0, 1] once per catalog.
+A query combines them with per-feature weights in a single vectorized
+expression and picks the best k with argpartition, so only the k winners
+are ever sorted. Preference flags can be hard filters (as in
+apply_filters), soft weights that push matching foods up, or both. The
+mood is a hard filter, so an unknown mood matches nothing; with any_mood
+set every food is ranked and the mood's own foods get the 'mood' weight.
+"""
+import numpy as np
+
+from catalog_schema import MACROS
+from recommender_engine import FILTER_NAMES
+
+# Positive weights reward high values, negative weights reward low ones
+DEFAULT_WEIGHTS = {
+    'mood': 2.0,
+    'calories': -1.0,
+    'prep_minutes': -0.5,
+    'protein': 0.5,
+    'fat': -0.25,
+    'carbs': 0.0,
+    'vegetarian': 0.0,
+}
+
+# Extra weight each soft preference adds on top of DEFAULT_WEIGHTS
+SOFT_WEIGHTS = {
+    'veg': {'vegetarian': 1.5},
+    'healthy': {'calories': -0.75, 'fat': -0.5, 'protein': 0.25},
+    'quick': {'prep_minutes': -1.5},
+    'low_cal': {'calories': -1.5},
+}
+
+DEFAULT_K = 10
+
+
+def bits_to_mask(bits, size):
+    """Expand an engine bitset into a boolean NumPy array"""
+    raw = np.frombuffer(bits.to_bytes((size + 7) // 8, 'little'), dtype=np.uint8)
+    return np.unpackbits(raw, bitorder='little')[:size].astype(bool)
+
+
+def normalize(values):
+    """Min-max scale to [0, 1]; missing values become the neutral 0.5"""
+    values = np.asarray(values, dtype=np.float32)
+    present = ~np.isnan(values)
+    if not present.any():
+        return np.full(values.shape, 0.5, dtype=np.float32)
+    low, high = values[present].min(), values[present].max()
+    span = high - low
+    scaled = (values - low) / span if span else np.zeros_like(values)
+    scaled[~present] = 0.5
+    return scaled.astype(np.float32)
+
+
+class ScoringEngine:
+    """Column arrays for one catalog plus the weighted top-k query over them"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.size = size = len(engine)
+        raw = self._raw_columns(engine)
+        self.features = {name: normalize(values) for name, values in raw.items()}
+        self.features['vegetarian'] = bits_to_mask(engine.filter_bits.get('veg', 0), size).astype(np.float32)
+        self.mood_masks = {mood: bits_to_mask(bits, size) for mood, bits in engine.mood_bits.items()}
+        self.filter_masks = {name: bits_to_mask(engine.filter_bits.get(name, 0), size)
+                             for name in FILTER_NAMES}
+
+    @staticmethod
+    def _raw_columns(engine):
+        """Numeric columns, zero-copy from a compiled catalog when available"""
+        compiled = getattr(engine, 'compiled', None)
+        if compiled is not None:
+            return {
+                'calories': np.frombuffer(compiled.section('calories'), dtype=np.int32),
+                'prep_minutes': np.frombuffer(compiled.section('prep_minutes'), dtype=np.int32),
+                **{macro: np.frombuffer(compiled.section(macro), dtype=np.float32) for macro in MACROS}
+            }
+        columns = {name: np.empty(len(engine), dtype=np.float32)
+                   for name in ('calories', 'prep_minutes') + MACROS}
+        for food_id in range(len(engine)):
+            record = engine.record(food_id)
+            columns['calories'][food_id] = record.calories
+            columns['prep_minutes'][food_id] = record.prep_minutes
+            for macro in MACROS:
+                columns[macro][food_id] = getattr(record, macro)
+        return columns
+
+    def weights_for(self, soft_mask=0, weights=None):
+        """Combine base weights with the boosts of the active soft preferences"""
+        combined = dict(DEFAULT_WEIGHTS)
+        combined.update(weights or {})
+        for i, name in enumerate(FILTER_NAMES):
+            if soft_mask & (1 << i):
+                for feature, boost in SOFT_WEIGHTS[name].items():
+                    combined[feature] = combined.get(feature, 0.0) + boost
+        return combined
+
+    def scores(self, mood, soft_mask=0, weights=None, any_mood=False):
+        """Score every food in the catalog for a mood"""
+        combined = self.weights_for(soft_mask, weights)
+        total = np.zeros(self.size, dtype=np.float32)
+        # Without any_mood only the mood's foods are candidates, so the term could not reorder them
+        mood_mask = self.mood_masks.get(mood)
+        if any_mood and mood_mask is not None and combined['mood']:
+            total += combined['mood'] * mood_mask
+        for feature, values in self.features.items():
+            weight = combined.get(feature, 0.0)
+            if weight:
+                total += weight * values
+        return total
+
+    def candidates(self, mood, hard_mask=0, any_mood=False, allowed_bits=None):
+        """Boolean mask of foods allowed by the hard filters
+
+        allowed_bits is an optional engine bitset (e.g. from ingredient
+        exclusions) that further restricts the candidates.
+        """
+        if any_mood:
+            allowed = np.ones(self.size, dtype=bool)
+        elif mood in self.mood_masks:
+            allowed = self.mood_masks[mood].copy()
+        else:
+            return np.zeros(self.size, dtype=bool)
+        for i, name in enumerate(FILTER_NAMES):
+            if hard_mask & (1 << i):
+                allowed &= self.filter_masks[name]
+        if allowed_bits is not None:
+            allowed &= bits_to_mask(allowed_bits, self.size)
+        return allowed
+
+    def top_k(self, mood, k=DEFAULT_K, hard_mask=0, soft_mask=0, weights=None, any_mood=False,
+              allowed=None):
+        """Return the ids of the k best-scoring allowed foods, best first"""
+        ids = np.flatnonzero(self.candidates(mood, hard_mask, any_mood, allowed))
+        if not len(ids) or k <= 0:
+            return []
+        candidate_scores = self.scores(mood, soft_mask, weights, any_mood)[ids]
+        if k < len(ids):
+            best = np.argpartition(-candidate_scores, k - 1)[:k]
+        else:
+            best = np.arange(len(ids))
+        # Only the k winners are sorted; ties keep catalog order
+        order = best[np.lexsort((ids[best], -candidate_scores[best]))]
+        return ids[order].tolist()
@@ -0,0 +1,133 @@
+"""Search-as-you-type over food names, types and ingredients
+
+Every word is split into padded trigrams (" ch", "chi", "hic", ...) and
+each trigram maps to the sorted ids of the foods whose name, type or
+ingredients contain it. A query keeps the foods that contain a fair
+share of its trigrams in at least one field and ranks them by the
+weighted shares, so typos and partial words still match, and only the
+posting lists of the query's own trigrams are touched. A one-letter
+word is too short for a trigram and matches every word it starts.
+
+Ingredient trigrams are derived from the ingredient index's word terms,
+so the catalog's free text is never re-read.
+"""
+import re
+
+import numpy as np
+
+# Matches in the name count more than matches in the type or ingredients
+FIELD_WEIGHTS = {'name': 3.0, 'type': 1.5, 'ingredients': 1.0}
+PREFIX_BONUS = 2.0
+MIN_SHARE = 0.34
+DEFAULT_LIMIT = 50
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def trigrams(text, prefix=False):
+    """Padded trigrams of every word; prefix=True leaves the last word open-ended"""
+    words = _WORD.findall(text.lower())
+    grams = set()
+    for i, word in enumerate(words):
+        open_end = prefix and i == len(words) - 1
+        padded = f" {word}" if open_end else f" {word} "
+        if len(padded) < 3:
+            padded += " "
+        grams.update(padded[j:j + 3] for j in range(len(padded) - 2))
+    return grams
+
+
+def _merge(postings):
+    """Union the id arrays collected for each trigram into one sorted array"""
+    return {gram: parts[0] if len(parts) == 1 else np.unique(np.concatenate(parts))
+            for gram, parts in postings.items()}
+
+
+class SearchIndex:
+    """Trigram posting lists per field plus a ranked fuzzy query"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.size = len(engine)
+        names = {}
+        types = {}
+        type_ids = {}
+        for food_id in range(self.size):
+            record = engine.record(food_id)
+            for gram in trigrams(record.name):
+                names.setdefault(gram, []).append(food_id)
+            if record.type:
+                type_ids.setdefault(record.type, []).append(food_id)
+        # Types repeat, so each distinct type is split into trigrams once
+        for food_type, ids in type_ids.items():
+            ids = np.array(ids, dtype=np.int32)
+            for gram in trigrams(food_type):
+                types.setdefault(gram, []).append(ids)
+        ingredients = {}
+        for term, ids in engine.ingredients.postings.items():
+            if ' ' in term or not len(ids):
+                continue
+            ids = np.asarray(ids, dtype=np.int32)
+            for gram in trigrams(term):
+                ingredients.setdefault(gram, []).append(ids)
+        self.fields = {
+            'name': {gram: np.array(ids, dtype=np.int32) for gram, ids in names.items()},
+            'type': _merge(types),
+            'ingredients': _merge(ingredients),
+        }
+
+    def _units(self, query, postings):
+        """Posting lists per query trigram; a one-letter last word matches any word it starts"""
+        grams = trigrams(query, prefix=True)
+        words = _WORD.findall(query.lower())
+        if words and len(words[-1]) == 1:
+            start = f" {words[-1]}"
+            grams.discard(start + " ")
+            yield [ids for gram, ids in postings.items() if gram.startswith(start)]
+        for gram in grams:
+            ids = postings.get(gram)
+            yield [] if ids is None else [ids]
+
+    def scores(self, query):
+        """Weighted match score per food and the best share of the query any one field matched"""
+        total = np.zeros(self.size, dtype=np.float32)
+        best = np.zeros(self.size, dtype=np.float32)
+        for field, postings in self.fields.items():
+            hits = np.zeros(self.size, dtype=np.float32)
+            count = 0
+            for parts in self._units(query, postings):
+                count += 1
+                if len(parts) == 1:
+                    hits[parts[0]] += 1
+                elif parts:
+                    matched = np.zeros(self.size, dtype=bool)
+                    for ids in parts:
+                        matched[ids] = True
+                    hits += matched
+            if not count:
+                return total, best
+            share = hits / count
+            total += FIELD_WEIGHTS[field] * share
+            np.maximum(best, share, out=best)
+        return total, best
+
+    def search(self, query, limit=DEFAULT_LIMIT):
+        """Return the ids of the best matches for query, best first"""
+        total, best = self.scores(query)
+        # A food must match a fair share of the query in at least one field
+        candidates = np.flatnonzero(best >= MIN_SHARE)
+        if not len(candidates):
+            return []
+        if len(candidates) > limit * 4:
+            keep = np.argpartition(-total[candidates], limit * 4 - 1)[:limit * 4]
+            candidates = candidates[keep]
+        # Names with a word starting with the query rank first among the shortlist
+        needle = ' ' + ' '.join(_WORD.findall(query.lower()))
+        ranked = []
+        for food_id in candidates.tolist():
+            score = float(total[food_id])
+            if needle in ' ' + self.engine.record(food_id).name.lower():
+                score += PREFIX_BONUS
+            ranked.append((-score, food_id))
+        ranked.sort()
+        return [food_id for _, food_id in ranked[:limit]]
@@ -0,0 +1,463 @@
+"""Headless HTTP/JSON recommendation service built on asyncio
+
+GET /recommend?mood=happy&veg=1&healthy=0&quick=1&low_cal=0
+    Same semantics as the GUI's apply_filters. Every mood/filter
+    combination is rendered once (up front, through the ResultCache), so a
+    request is a dict lookup. Responses carry an ETag and honour
+    If-None-Match with 304.
+    Add rank=1 to get the k best matches ranked by score (k=10 by
+    default, at most 100); soft=veg,quick,... lists preferences that should
+    boost the score rather than filter.
+    exclude=peanut,milk drops foods containing any of the ingredients and
+    require=banana keeps only foods containing all of them. These and
+    ranked queries are not pre-rendered; the latest few hundred are kept
+    in a bounded LRU.
+GET /health
+GET /stats
+    Result cache hit/miss counters.
+GET /metrics
+    Hot-path counters and latency histograms as Prometheus text, or JSON
+    with format=json. Collected only when started with --perf.
+
+The catalog file is watched; edits are reloaded, pre-rendered and swapped
+in atomically, while a bad edit keeps the previous version serving.
+
+With --workers N the parent loads and pre-renders the catalog, then forks
+N workers that accept on one shared socket. They share the memory-mapped
+compiled catalog and the rendered responses, so throughput scales with
+cores while the catalog is held once (POSIX only). Only the parent watches
+the catalog: it reloads an edit once and replaces the workers with fresh
+forks.
+
+Usage: python -m food_recommender serve [--host 127.0.0.1] [--port 8080] [--catalog PATH]
+                                        [--workers N] [--perf]
+"""
+import argparse
+import asyncio
+import gc
+import hashlib
+import json
+import os
+import signal
+import socket
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import perf
+from catalog_compiler import load_engine
+from catalog_schema import format_rejections, format_warnings
+from ingredient_index import parse_terms
+from recommender_engine import DEFAULT_CATALOG, FILTER_NAMES, TRUE_VALUES
+from result_cache import ResultCache
+from catalog_watcher import POLL_INTERVAL, CatalogWatcher
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8080
+KEEP_ALIVE_TIMEOUT = 15
+MAX_HEADER_BYTES = 16 * 1024
+
+# Pre-fork mode: how often the parent reaps workers, and how long a retired
+# worker keeps running after it stops accepting so responses in flight finish
+REAP_INTERVAL = 0.1
+WORKER_DRAIN_SECONDS = 1.0
+
+JSON_TYPE = 'application/json; charset=utf-8'
+PROMETHEUS_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+DEFAULT_K = 10
+MAX_K = 100
+
+REASONS = {
+    200: 'OK',
+    304: 'Not Modified',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+}
+
+
+class Response:
+    """A pre-rendered response body with its ETag
+
+    payload is serialized as JSON unless it is already text.
+    """
+
+    __slots__ = ('status', 'body', 'etag', 'content_type')
+
+    def __init__(self, status, payload, content_type=JSON_TYPE):
+        self.status = status
+        self.content_type = content_type
+        if isinstance(payload, str):
+            self.body = payload.encode('utf-8')
+        else:
+            self.body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.etag = '"' + hashlib.sha1(self.body).hexdigest() + '"'
+
+
+class RecommendationService:
+    """Precomputes the JSON response for every mood and filter combination"""
+
+    def __init__(self, engine, cache=None):
+        self.state = self.warm(engine, cache or ResultCache())
+
+    @property
+    def engine(self):
+        return self.state[0]
+
+    @property
+    def cache(self):
+        return self.state[1]
+
+    def warm(self, engine, cache):
+        """Render every mood and filter combination ahead of the first request"""
+        for mood in engine.moods:
+            for mask in range(1 << len(FILTER_NAMES)):
+                self.response(mood, mask, (engine, cache))
+        return engine, cache
+
+    def swap(self, engine, diff=None):
+        """Pre-render a reloaded catalog, then replace the served one in one step"""
+        self.state = self.warm(engine, ResultCache())
+        print(f"Catalog reloaded: {diff}")
+
+    def response(self, mood, mask, state=None, terms=((), ())):
+        """Return the memoized JSON response for a query"""
+        engine, cache = state or self.state
+        filters = {name: bool(mask & (1 << i)) for i, name in enumerate(FILTER_NAMES)}
+
+        def render(food_ids):
+            foods = [engine.details(food_id) for food_id in food_ids]
+            payload = {'mood': mood, 'filters': filters, 'count': len(foods), 'foods': foods}
+            if terms != ((), ()):
+                payload['exclude'], payload['require'] = terms
+            return Response(200, payload)
+
+        return cache.rendered(engine, mood, mask, 'json', render, terms)
+
+    def recommend(self, query):
+        """Look up the response for a parsed query string"""
+        state = self.state
+        engine = state[0]
+        mood = query.get('mood', [''])[0].lower()
+        if not mood:
+            return Response(400, {'error': 'mood is required', 'moods': engine.moods})
+        mask = 0
+        for i, name in enumerate(FILTER_NAMES):
+            if query.get(name, ['0'])[0].lower() in TRUE_VALUES:
+                mask |= 1 << i
+        if mood not in engine.mood_bits:
+            return Response(404, {'error': f'unknown mood {mood!r}', 'moods': engine.moods})
+        terms = (parse_terms(','.join(query.get('exclude', []))),
+                 parse_terms(','.join(query.get('require', []))))
+        if query.get('rank', ['0'])[0].lower() in TRUE_VALUES:
+            return self.ranked_response(mood, mask, query, state, terms)
+        return self.response(mood, mask, state, terms)
+
+    def ranked_response(self, mood, mask, query, state, terms=((), ())):
+        """Return the memoized top-k response for a ranked query"""
+        engine, cache = state
+        try:
+            k = min(max(int(query.get('k', [DEFAULT_K])[0]), 1), MAX_K)
+        except ValueError:
+            return Response(400, {'error': 'k must be an integer'})
+        soft_names = [name for value in query.get('soft', []) for name in value.split(',') if name]
+        unknown = set(soft_names) - set(FILTER_NAMES)
+        if unknown:
+            return Response(400, {'error': f'unknown soft preferences {sorted(unknown)}'})
+        soft_mask = sum(1 << FILTER_NAMES.index(name) for name in set(soft_names))
+
+        def render(food_ids):
+            ranked = engine.rank(mood, k, hard_mask=mask, soft_mask=soft_mask,
+                                 exclude=terms[0], require=terms[1])
+            foods = [engine.details(food_id) for food_id in ranked]
+            return Response(200, {'mood': mood, 'k': k, 'soft': sorted(set(soft_names)),
+                                  'exclude': terms[0], 'require': terms[1],
+                                  'count': len(foods), 'foods': foods})
+
+        return cache.rendered(engine, mood, mask, ('rank', k, soft_mask), render, terms)
+
+    def handle(self, method, target):
+        """Route a request to a Response, timing it when instrumentation is on"""
+        with perf.timer('server.request'):
+            response = self.route(method, target)
+        perf.count(f'server.status.{response.status}')
+        return response
+
+    def route(self, method, target):
+        if method not in ('GET', 'HEAD'):
+            return Response(405, {'error': 'only GET is supported'})
+        url = urlsplit(target)
+        if url.path == '/recommend':
+            return self.recommend(parse_qs(url.query))
+        if url.path == '/health':
+            return Response(200, {'status': 'ok', 'foods': len(self.engine)})
+        if url.path == '/stats':
+            return Response(200, {'cache': self.cache.stats(), 'catalog_version': self.engine.version,
+                                  'rejected': len(self.engine.rejected),
+                                  'warnings': len(self.engine.warnings), 'pid': os.getpid()})
+        if url.path == '/metrics':
+            if parse_qs(url.query).get('format', [''])[0] == 'json':
+                return Response(200, perf.REGISTRY.snapshot())
+            return Response(200, perf.REGISTRY.to_prometheus(), PROMETHEUS_TYPE)
+        return Response(404, {'error': f'no route for {url.path}'})
+
+
+async def read_request(reader):
+    """Read one request head and return (method, target, version, headers)"""
+    head = await reader.readuntil(b'\r\n\r\n')
+    if len(head) > MAX_HEADER_BYTES:
+        raise ValueError('request header too large')
+    lines = head.decode('latin-1').split('\r\n')
+    method, target, version = lines[0].split(' ', 2)
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+    # Requests are GETs; drain any body so the next request parses cleanly
+    length = int(headers.get('content-length', 0) or 0)
+    if length:
+        await reader.readexactly(length)
+    return method, target, version, headers
+
+
+def wants_keep_alive(version, headers):
+    connection = headers.get('connection', '').lower()
+    if version == 'HTTP/1.0':
+        return connection == 'keep-alive'
+    return connection != 'close'
+
+
+def render_response(response, method, headers, keep_alive):
+    """Serialize a Response, answering 304 when the client's ETag matches"""
+    status = response.status
+    body = response.body
+    if status == 200 and response.etag in headers.get('if-none-match', ''):
+        status, body = 304, b''
+    head = [
+        f'HTTP/1.1 {status} {REASONS[status]}',
+        f'Content-Type: {response.content_type}',
+        f'Content-Length: {len(body)}',
+        f'ETag: {response.etag}',
+        'Cache-Control: no-cache',
+        f"Connection: {'keep-alive' if keep_alive else 'close'}",
+    ]
+    if keep_alive:
+        head.append(f'Keep-Alive: timeout={KEEP_ALIVE_TIMEOUT}')
+    payload = ('\r\n'.join(head) + '\r\n\r\n').encode('latin-1')
+    if method != 'HEAD':
+        payload += body
+    return payload
+
+
+class RecommendationServer:
+    """asyncio HTTP/1.1 server with keep-alive in front of a RecommendationService"""
+
+    def __init__(self, service, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.service = service
+        self.host = host
+        self.port = port
+        self.server = None
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(read_request(reader), KEEP_ALIVE_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    break
+                except (ValueError, asyncio.LimitOverrunError):
+                    writer.write(render_response(Response(400, {'error': 'bad request'}), 'GET', {}, False))
+                    break
+                method, target, version, headers = request
+                keep_alive = wants_keep_alive(version, headers)
+                response = self.service.handle(method, target)
+                writer.write(render_response(response, method, headers, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def start(self, sock=None):
+        if sock is not None:
+            self.server = await asyncio.start_server(self.handle_connection, sock=sock)
+        else:
+            self.server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        return self.server
+
+    async def serve_forever(self, sock=None):
+        server = await self.start(sock)
+        async with server:
+            await server.serve_forever()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Serve mood food recommendations over HTTP")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--catalog', default=DEFAULT_CATALOG)
+    parser.add_argument('--perf', action='store_true', help="collect timings for /metrics")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="pre-forked worker processes sharing the socket and the mapped catalog")
+    return parser
+
+
+def watch_catalog(service, path, on_reload=None):
+    """A watcher keeping a service in sync with edits to its catalog file (not yet started)"""
+    return CatalogWatcher(
+        path,
+        service.engine,
+        on_reload=on_reload or service.swap,
+        on_error=lambda error: print(f"Catalog update ignored, keeping previous version: {error}")
+    )
+
+
+def load_catalog(path):
+    """Load the engine, reporting entries that failed validation"""
+    engine = load_engine(path)
+    if engine.rejected:
+        print(format_rejections(engine.rejected))
+    if engine.warnings:
+        print(format_warnings(engine.warnings))
+    return engine
+
+
+def serve(args):
+    """Load the catalog and serve until interrupted"""
+    if args.perf:
+        perf.enable()
+    if args.workers > 1 and hasattr(os, 'fork'):
+        serve_workers(args)
+        return
+    service = RecommendationService(load_catalog(args.catalog))
+    watch_catalog(service, args.catalog).start()
+    server = RecommendationServer(service, args.host, args.port)
+    print(f"Serving recommendations on http://{args.host}:{args.port}/recommend")
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+async def serve_worker(server, sock):
+    """Serve on the shared socket until SIGTERM, then drain and return"""
+    stopped = asyncio.Event()
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stopped.set)
+    listener = await server.start(sock)
+    await stopped.wait()
+    # Stop accepting; the other workers pick up new connections
+    listener.close()
+    await asyncio.sleep(WORKER_DRAIN_SECONDS)
+
+
+def run_worker(args, service, sock):
+    """Body of one pre-forked worker: serve the inherited service on the shared socket"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    server = RecommendationServer(service, args.host, args.port)
+    asyncio.run(serve_worker(server, sock))
+
+
+def serve_workers(args):
+    """Pre-fork mode: one listening socket, args.workers processes accepting on it
+
+    The parent maps the compiled catalog and pre-renders every response
+    once, then forks. Workers share the mapped file through the page cache
+    and the rendered bodies copy-on-write (gc.freeze keeps the collector
+    from touching, and so copying, the inherited objects).
+
+    The parent alone watches the catalog, polling from its reap loop so no
+    thread is running when it forks. An edit is compiled and rendered once,
+    then a new set of workers is forked from the updated service and the
+    old ones drain and exit. Workers that die are restarted from the
+    current catalog.
+    """
+    service = RecommendationService(load_catalog(args.catalog))
+    gc.freeze()
+    sock = socket.create_server((args.host, args.port), backlog=1024)
+    workers = {}
+    retiring = set()
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                run_worker(args, service, sock)
+            except BaseException:
+                code = 1
+            finally:
+                os._exit(code)
+        workers[pid] = time.monotonic()
+
+    def retire(pids):
+        for pid in pids:
+            workers.pop(pid, None)
+            retiring.add(pid)
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def stop(signum=None, frame=None):
+        nonlocal stopping
+        stopping = True
+        retire(list(workers))
+
+    def reload(engine, diff):
+        service.swap(engine, diff)
+        gc.freeze()
+        old = list(workers)
+        for _ in range(args.workers):
+            spawn()
+        retire(old)
+
+    watcher = watch_catalog(service, args.catalog, on_reload=reload)
+
+    for _ in range(args.workers):
+        spawn()
+    signal.signal(signal.SIGTERM, stop)
+    print(f"Serving recommendations on http://{args.host}:{args.port}/recommend "
+          f"with {args.workers} workers")
+    next_check = time.monotonic() + POLL_INTERVAL
+    try:
+        while workers or retiring:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+                if pid == 0:
+                    if not stopping and time.monotonic() >= next_check:
+                        watcher.check()
+                        next_check = time.monotonic() + POLL_INTERVAL
+                    time.sleep(REAP_INTERVAL)
+                    continue
+            except ChildProcessError:
+                break
+            except KeyboardInterrupt:
+                stop()
+                continue
+            if pid in retiring:
+                retiring.discard(pid)
+                continue
+            started = workers.pop(pid, None)
+            if started is not None and not stopping:
+                print(f"Worker {pid} exited with status {status}, restarting")
+                # Avoid a tight respawn loop if workers die right after starting
+                if time.monotonic() - started < 1:
+                    time.sleep(1)
+                spawn()
+    finally:
+        sock.close()
+
+
+def main(argv=None):
+    serve(build_parser().parse_args(argv))
+
+
+if __name__ == "__main__":
+    main()
@@ -19,6 +19,14 @@ def setup_application():
         print(f"Note: Could not download images automatically: {e}")
         print("You can manually add food images to the 'images' folder.")
     
+    # Pre-resize thumbnails so the first launch skips decoding
+    print("Prewarming thumbnail cache...")
+    try:
+        import thumbnail_cache
+        thumbnail_cache.prewarm()
+    except Exception as e:
+        print(f"Note: Could not prewarm thumbnail cache: {e}")
+    
     print("\n✅ Setup completed!")
     print("🎯 Run the application with: python main.py")
     print("📁 Make sure these files are in the same folder:")
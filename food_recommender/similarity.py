@@ -0,0 +1,113 @@
+"""Content-based "more like this" lookups over precomputed food vectors
+
+Every food becomes one row of a dense float32 matrix built once per
+catalog, concatenating three L2-normalized blocks:
+
+    ingredients   TF-IDF weights of the ingredient terms, hashed into a
+                  fixed number of columns so the width never depends on
+                  the vocabulary size
+    type          the food type, hashed the same way
+    nutrition     the scoring engine's normalized calories, prep time and
+                  macros, centred on the catalog mean
+
+Rows are unit length, so the cosine similarity of one food to the whole
+catalog is a single matrix-vector product. An optional neighbour table
+holds the top-N ids per food, turning a lookup into a row read.
+"""
+import math
+import zlib
+
+import numpy as np
+
+INGREDIENT_DIMS = 256
+TYPE_DIMS = 16
+NUTRITION_FEATURES = ('calories', 'prep_minutes', 'carbs', 'protein', 'fat')
+
+# Relative influence of each block on the similarity
+BLOCK_WEIGHTS = {'ingredients': 1.0, 'type': 0.6, 'nutrition': 0.4}
+
+DEFAULT_K = 10
+NEIGHBOUR_BATCH = 1024
+# The neighbour table costs O(n^2) to build, so only small catalogs get one up front
+NEIGHBOUR_TABLE_MAX_FOODS = 5000
+
+
+def hash_column(text, dims):
+    """Stable column for a term (Python's hash() changes between runs)"""
+    return zlib.crc32(text.encode('utf-8')) % dims
+
+
+def _unit_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class SimilarityIndex:
+    """Unit-length feature vectors for a catalog plus cosine top-k queries"""
+
+    def __init__(self, engine, ingredient_dims=INGREDIENT_DIMS, type_dims=TYPE_DIMS,
+                 neighbours=DEFAULT_K):
+        self.size = size = len(engine)
+        self.neighbours = None
+
+        # Document frequencies come straight from the ingredient posting lists
+        ingredients = np.zeros((size, ingredient_dims), dtype=np.float32)
+        for term, ids in engine.ingredients.postings.items():
+            if not len(ids):
+                continue
+            idf = math.log((size + 1) / (len(ids) + 1)) + 1.0
+            ingredients[np.asarray(ids, dtype=np.intp), hash_column(term, ingredient_dims)] += idf
+
+        types = np.zeros((size, type_dims), dtype=np.float32)
+        columns = {}
+        for food_id in range(size):
+            food_type = engine.record(food_id).type
+            if food_type:
+                column = columns.get(food_type)
+                if column is None:
+                    column = columns[food_type] = hash_column(food_type.lower(), type_dims)
+                types[food_id, column] = 1.0
+
+        features = engine.scorer.features
+        nutrition = np.stack([features[name] for name in NUTRITION_FEATURES], axis=1)
+        nutrition = nutrition - nutrition.mean(axis=0) if size else nutrition
+
+        self.matrix = _unit_rows(np.hstack([
+            BLOCK_WEIGHTS['ingredients'] * _unit_rows(ingredients),
+            BLOCK_WEIGHTS['type'] * _unit_rows(types),
+            BLOCK_WEIGHTS['nutrition'] * _unit_rows(nutrition.astype(np.float32)),
+        ])).astype(np.float32)
+
+        if neighbours and size <= NEIGHBOUR_TABLE_MAX_FOODS:
+            self.build_neighbours(neighbours)
+
+    def scores(self, food_id):
+        """Cosine similarity of one food to every food, in one product"""
+        return self.matrix @ self.matrix[food_id]
+
+    def _top(self, scores, food_id, k):
+        scores = scores.copy()
+        scores[food_id] = -np.inf
+        k = min(k, self.size - 1)
+        if k <= 0:
+            return np.empty(0, dtype=np.intp)
+        best = np.argpartition(-scores, k - 1)[:k]
+        return best[np.lexsort((best, -scores[best]))]
+
+    def similar(self, food_id, k=DEFAULT_K):
+        """Return the ids of the k foods most similar to food_id, best first"""
+        if self.neighbours is not None and k <= self.neighbours.shape[1]:
+            return self.neighbours[food_id, :k].tolist()
+        return self._top(self.scores(food_id), food_id, k).tolist()
+
+    def build_neighbours(self, n=DEFAULT_K, batch=NEIGHBOUR_BATCH):
+        """Precompute the top-n neighbours of every food, a batch of rows at a time"""
+        n = min(n, max(self.size - 1, 0))
+        table = np.empty((self.size, n), dtype=np.int32)
+        for start in range(0, self.size, batch):
+            block = self.matrix[start:start + batch] @ self.matrix.T
+            for offset, scores in enumerate(block):
+                table[start + offset] = self._top(scores, start + offset, n)
+        self.neighbours = table
+        return table
@@ -0,0 +1,163 @@
+"""Persistent on-disk cache of resized thumbnails
+
+Thumbnails are stored as raw RGB buffers keyed by the source path, its
+mtime and size, and the target size, so a warm start skips both the JPEG
+decode and the resample. Least recently used entries are evicted once the
+cache grows past its size limit.
+
+Usage: python thumbnail_cache.py prewarm [food_data.json]
+       python thumbnail_cache.py clear
+"""
+import hashlib
+import os
+import sys
+import threading
+
+import perf
+from image_loader import THUMBNAIL_SIZE, decode_thumbnail
+
+CACHE_DIR = '.thumbcache'
+CACHE_LIMIT_BYTES = 128 * 1024 * 1024
+
+
+class ThumbnailCache:
+    """Raw RGB thumbnail store with LRU eviction by total size"""
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=CACHE_LIMIT_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._total_bytes = None
+        self._lock = threading.Lock()
+
+    def key(self, path, size=THUMBNAIL_SIZE):
+        """Cache key from the source identity and the target size"""
+        stat = os.stat(path)
+        ident = f"{os.path.abspath(path)}|{stat.st_mtime_ns}|{stat.st_size}|{size[0]}x{size[1]}"
+        return hashlib.sha1(ident.encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key, size):
+        return os.path.join(self.directory, f"{key}_{size[0]}x{size[1]}.rgb")
+
+    def get(self, path, size=THUMBNAIL_SIZE):
+        """Return the cached thumbnail for path, or None on a miss"""
+        entry = self._entry_path(self.key(path, size), size)
+        try:
+            with open(entry, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        if len(data) != size[0] * size[1] * 3:
+            return None
+        # Bump the mtime so eviction treats this entry as recently used
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+        from PIL import Image
+
+        return Image.frombytes('RGB', size, data)
+
+    def put(self, path, image, size=THUMBNAIL_SIZE):
+        """Store a thumbnail and evict old entries if over the size limit"""
+        os.makedirs(self.directory, exist_ok=True)
+        entry = self._entry_path(self.key(path, size), size)
+        data = image.convert('RGB').tobytes()
+        tmp_path = f"{entry}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, entry)
+
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum(nbytes for _, nbytes, _ in self._entries())
+            else:
+                self._total_bytes += len(data)
+            if self._total_bytes > self.max_bytes:
+                self.evict()
+
+    def load(self, path, size=THUMBNAIL_SIZE):
+        """Return a thumbnail from the cache, decoding and storing it on a miss"""
+        image = self.get(path, size)
+        if image is not None:
+            self.hits += 1
+            perf.count('thumbnail_cache.hit')
+            return image
+        self.misses += 1
+        perf.count('thumbnail_cache.miss')
+        image = decode_thumbnail(path, size)
+        try:
+            self.put(path, image, size)
+        except OSError as e:
+            print(f"Could not cache thumbnail for {path}: {e}")
+        return image
+
+    def _entries(self):
+        """Yield (path, size, mtime) for every cache entry"""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return
+        for name in names:
+            if name.endswith('.rgb'):
+                entry = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(entry)
+                except OSError:
+                    continue
+                yield entry, stat.st_size, stat.st_mtime_ns
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits its limit"""
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        total = sum(nbytes for _, nbytes, _ in entries)
+        for entry, nbytes, _ in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(entry)
+                total -= nbytes
+            except OSError:
+                pass
+        self._total_bytes = total
+
+    def clear(self):
+        for entry, _, _ in list(self._entries()):
+            os.remove(entry)
+        self._total_bytes = 0
+
+
+def image_paths(catalog_path):
+    """List the distinct image files referenced by a catalog, default image first"""
+    from catalog_compiler import load_engine
+
+    engine = load_engine(catalog_path)
+    paths = [os.path.join(engine.base_dir, 'default_food.jpg')]
+    paths.extend(engine.image_path(food_id) for food_id in range(len(engine)))
+    return [path for path in dict.fromkeys(paths) if os.path.exists(path)]
+
+
+def prewarm(catalog_path='food_data.json', cache=None):
+    """Decode every catalog image into the cache ahead of the first launch"""
+    base_dir = os.path.dirname(catalog_path) or '.'
+    cache = cache or ThumbnailCache(os.path.join(base_dir, CACHE_DIR))
+    for path in image_paths(catalog_path):
+        try:
+            cache.load(path)
+        except Exception as e:
+            print(f"Error caching {path}: {e}")
+    print(f"Thumbnail cache ready: {cache.misses} decoded, {cache.hits} already cached")
+    return cache
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else 'prewarm'
+    if command == 'prewarm':
+        prewarm(sys.argv[2] if len(sys.argv) > 2 else 'food_data.json')
+    elif command == 'clear':
+        ThumbnailCache().clear()
+        print("Thumbnail cache cleared")
+    else:
+        print(__doc__)
+        sys.exit(1)